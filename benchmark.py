@@ -0,0 +1,400 @@
+"""
+Medición del desempeño de las búsquedas
+
+Se buscan posiciones fijas de cada juego (apertura, medio juego y final)
+con negamax a profundidad fija, y con minimax y alpha_beta de
+juegos_simplificado en las posiciones donde se puede buscar hasta el
+final. Por cada búsqueda se guarda el número de nodos, el tiempo, los
+nodos por segundo, el valor y la jugada elegida. Antes de cada búsqueda
+se fija la semilla de `random`, pues se usa `shuffle` cuando no hay
+función de ordenamiento, así que los nodos y las jugadas siempre son los
+mismos; sólo cambian los tiempos.
+
+Los resultados se pueden guardar en JSON y comparar con los de una
+corrida anterior. Es regresión que bajen los nodos por segundo o suba el
+tiempo más del umbral; que cambien los nodos o la jugada sólo se 
+informa, pues es lo que se espera de un cambio a la búsqueda:
+
+    python benchmark.py --salida base.json
+    (... cambios al motor ...)
+    python benchmark.py --base base.json --umbral 0.1
+
+Con --profundidad se mide también el tiempo a cada profundidad: se busca
+cada posición con negamax_iterativo durante los segundos dados y se 
+anota cuánto tiempo llevaba la búsqueda al completar cada profundidad.
+
+    python benchmark.py --algoritmos negamax --profundidad 5
+
+"""
+
+import json
+from functools import partial
+from random import seed
+from time import perf_counter
+
+from juegos_simplificado import minimax, alpha_beta
+from minimax import negamax_en_sitio, TablaTransposicion, Estadisticas
+from minimax import negamax_iterativo
+from gato import Gato
+from conect4 import Conecta4, Conecta4Bits, Conecta4Incremental
+from conect4 import ordena_centro, evalua_3con, evalua_3con_bits
+from conect4 import evalua_3con_inc
+from otello import Otello, OtelloBits, ordenar, evaluar, evaluar_bits
+from otello import OtelloIncremental, evaluar_inc
+
+
+# Posiciones de cada juego: (nombre, jugadas desde el estado inicial,
+# profundidad para negamax, si se busca hasta el final con minimax y
+# alpha_beta)
+POSICIONES = {
+    'gato': [
+        ('apertura', [4], None, True),
+        ('medio', [4, 0], None, True),
+        ('final', [4, 0, 8, 2], None, True),
+    ],
+    'conecta4': [
+        ('apertura', [], 7, False),
+        ('medio', [1, 4, 6, 6, 6, 0, 2, 0], 7, False),
+        ('final', [1, 4, 6, 6, 6, 0, 2, 0, 3, 6, 3, 3, 5, 3, 6, 1], 7,
+         False),
+    ],
+    'otello': [
+        ('apertura', [], 5, False),
+        ('medio', [(3, 2), (4, 2), (5, 1), (2, 3), (1, 2), (6, 0), (5, 3),
+                   (6, 4), (6, 3), (2, 4), (4, 1), (1, 3)], 4, False),
+        ('final', [(3, 2), (4, 2), (5, 1), (2, 3), (1, 2), (6, 0), (5, 3),
+                   (6, 4), (6, 3), (2, 4), (4, 1), (1, 3), (6, 5), (0, 1),
+                   (6, 1), (5, 2), (5, 4), (7, 4), (0, 3), (7, 0), (6, 2),
+                   (3, 0), (7, 1), (2, 2), (4, 5), (0, 4), (2, 1), (0, 2),
+                   (1, 1), (1, 0), (7, 3), (7, 5), (0, 0), (5, 5), (6, 6),
+                   (3, 6), (3, 1), (2, 0), (7, 6), (5, 0), (4, 6), (5, 6),
+                   (4, 0), (6, 7), (2, 7), (2, 6), (1, 6), (5, 7), (1, 5),
+                   (0, 6), (3, 5), (7, 7), (4, 7), (2, 5)], None, True),
+    ],
+}
+
+# Modelo, función de ordenamiento, función de evaluación y posiciones
+JUEGOS = {
+    'gato': (Gato, None, None, 'gato'),
+    'conecta4': (Conecta4, ordena_centro, evalua_3con, 'conecta4'),
+    'conecta4_inc': (
+        Conecta4Incremental, ordena_centro, evalua_3con_inc, 'conecta4'),
+    'conecta4_bits': (
+        Conecta4Bits, ordena_centro, evalua_3con_bits, 'conecta4'),
+    'otello': (Otello, ordenar, evaluar, 'otello'),
+    'otello_inc': (OtelloIncremental, ordenar, evaluar_inc, 'otello'),
+    'otello_bits': (OtelloBits, ordenar, evaluar_bits, 'otello'),
+    # Con las posiciones simétricas en la misma entrada de la tabla
+    'conecta4_bits_sim': (
+        partial(Conecta4Bits, simetrias=True), ordena_centro, 
+        evalua_3con_bits, 'conecta4'),
+    'otello_bits_sim': (
+        partial(OtelloBits, simetrias=True), ordenar, evaluar_bits, 
+        'otello'),
+}
+
+
+def contador(juego):
+    """
+    Devuelve una copia del juego que cuenta en `nodos` cuántos estados
+    se generan, sin importar si es con transicion, transicion_clave o
+    hace
+
+    """
+    clase = type(juego)
+
+    class Contado(clase):
+        nodos = 0
+
+        def transicion(self, s, a, j):
+            self.nodos += 1
+            return clase.transicion(self, s, a, j)
+
+        def transicion_clave(self, s, clave, a, j):
+            self.nodos += 1
+            return clase.transicion_clave(self, s, clave, a, j)
+
+        def hace(self, m, a, j):
+            self.nodos += 1
+            return clase.hace(self, m, a, j)
+
+    Contado.__name__ = clase.__name__
+    contado = Contado.__new__(Contado)
+    contado.__dict__.update(juego.__dict__)
+    return contado
+
+
+def posicion(juego, jugadas):
+    s, j = juego.inicializa()
+    for a in jugadas:
+        s, j = juego.transicion(s, a, j), -j
+    return s, j
+
+
+def mide(juego, s, j, algoritmo, ordena, d, evalua, semilla):
+    """
+    Busca una vez y devuelve (nodos, segundos, jugada, valor,
+    estadísticas de negamax)
+
+    """
+    juego = contador(juego)
+    seed(semilla)
+    t0 = perf_counter()
+    valor, estadisticas = None, None
+    if algoritmo == 'negamax':
+        estadisticas = Estadisticas()
+        traza, valor = negamax_en_sitio(
+            juego, s, j, ordena=ordena, d=d, evalua=evalua,
+            transp=TablaTransposicion(2**18), traza=[],
+            estadisticas=estadisticas
+        )
+        jugada = traza[0]
+        estadisticas = estadisticas.como_dict()
+    elif algoritmo == 'alpha_beta':
+        jugada = alpha_beta(juego, s, j)
+    else:
+        jugada = minimax(juego, s, j)
+    return juego.nodos + 1, perf_counter() - t0, jugada, valor, estadisticas
+
+
+def corre(juegos=None, algoritmos=None, repeticiones=1, semilla=0):
+    """
+    Corre las búsquedas y devuelve la lista de resultados
+
+    Cada resultado es un diccionario con el 'juego', la 'posicion', el
+    'algoritmo', la profundidad 'd', los 'nodos', los 'segundos' (el
+    menor de las repeticiones), los nodos por segundo 'nps', la 'jugada'
+    y, sólo para negamax, el 'valor' y las 'estadisticas' de la búsqueda
+    (ver minimax.Estadisticas).
+
+    """
+    resultados = []
+    for nombre in juegos or JUEGOS:
+        clase, ordena, evalua, suite = JUEGOS[nombre]
+        juego = clase()
+        for pos, jugadas, d, completa in POSICIONES[suite]:
+            s, j = posicion(juego, jugadas)
+            busquedas = [('negamax', d)]
+            if completa:
+                busquedas += [('alpha_beta', None), ('minimax', None)]
+            for algoritmo, prof in busquedas:
+                if algoritmos and algoritmo not in algoritmos:
+                    continue
+                mediciones = [
+                    mide(juego, s, j, algoritmo, ordena, prof, evalua,
+                         semilla)
+                    for _ in range(repeticiones)
+                ]
+                nodos, _, jugada, valor, estadisticas = mediciones[0]
+                segundos = min(m[1] for m in mediciones)
+                resultados.append({
+                    'juego': nombre, 'posicion': pos,
+                    'algoritmo': algoritmo, 'd': prof, 'nodos': nodos,
+                    'segundos': segundos, 'nps': nodos / segundos,
+                    'jugada': jugada, 'valor': valor,
+                    'estadisticas': estadisticas,
+                })
+    return resultados
+
+
+def profundiza(juegos=None, tiempo=5, semilla=0):
+    """
+    Busca cada posición con profundidad iterativa durante `tiempo` 
+    segundos y devuelve la lista de resultados
+
+    Cada resultado tiene el 'juego', la 'posicion', el 'tiempo' dado y
+    las 'profundidades' completas, cada una con la profundidad 'd', los
+    'segundos' desde el inicio de la búsqueda hasta completarla, los 
+    'nodos' de esa iteración y el 'valor'. Las iteraciones que ya 
+    llegan al final del juego (con los mismos nodos que la anterior) no
+    se anotan, y los juegos sin función de evaluación (el gato) no se 
+    miden.
+
+    """
+    resultados = []
+    for nombre in juegos or JUEGOS:
+        clase, ordena, evalua, suite = JUEGOS[nombre]
+        if evalua == None:
+            continue
+        juego = clase()
+        for pos, jugadas, _, _ in POSICIONES[suite]:
+            s, j = posicion(juego, jugadas)
+            registros = []
+            seed(semilla)
+            negamax_iterativo(
+                juego, s, j, tiempo=tiempo, ordena=ordena, 
+                evalua=evalua, informe=registros.append
+            )
+            profundidades, nodos = [], None
+            for r in registros:
+                if not r['completa'] or r['nodos'] == nodos:
+                    break
+                nodos = r['nodos']
+                profundidades.append({
+                    'd': r['d'], 'segundos': r['tiempo'], 
+                    'nodos': r['nodos'], 'valor': r['valor']
+                })
+            resultados.append({
+                'juego': nombre, 'posicion': pos, 'tiempo': tiempo,
+                'profundidades': profundidades,
+            })
+    return resultados
+
+
+def compara(resultados, base, umbral=0.1, minimo=0.05):
+    """
+    Compara los resultados con los de una corrida base
+
+    Devuelve (regresiones, cambios), dos listas de textos. Son 
+    regresiones las búsquedas cuyos nodos por segundo bajaron, o cuyo 
+    tiempo subió, más de `umbral` (como fracción). Son cambios las 
+    búsquedas que ahora visitan otro número de nodos o eligen otra 
+    jugada: indican que cambió la búsqueda y no sólo su velocidad, pero
+    no son errores. Las búsquedas que en la base tardaron menos de 
+    `minimo` segundos son demasiado ruidosas y no se comparan por 
+    velocidad.
+
+    """
+    def llave(r):
+        return r['juego'], r['posicion'], r['algoritmo'], r['d']
+
+    anteriores = {llave(r): r for r in base}
+    regresiones, cambios = [], []
+    for r in resultados:
+        b = anteriores.get(llave(r))
+        if b == None:
+            continue
+        nombre = '{} {} {} d={}'.format(*llave(r))
+        if b['segundos'] >= minimo:
+            if r['nps'] < (1 - umbral) * b['nps']:
+                regresiones.append(
+                    f"{nombre}: {r['nps']:.0f} nodos/s, "
+                    f"antes {b['nps']:.0f}"
+                )
+            if r['segundos'] > (1 + umbral) * b['segundos']:
+                regresiones.append(
+                    f"{nombre}: {r['segundos']:.3f} s, "
+                    f"antes {b['segundos']:.3f}"
+                )
+        if r['nodos'] != b['nodos']:
+            cambios.append(
+                f"{nombre}: {r['nodos']} nodos, antes {b['nodos']}"
+            )
+        if json.loads(json.dumps(r['jugada'])) != b['jugada']:
+            cambios.append(
+                f"{nombre}: jugada {r['jugada']}, antes {b['jugada']}"
+            )
+    return regresiones, cambios
+
+
+def compara_profundidades(resultados, base, umbral=0.1, minimo=0.05):
+    """
+    Compara los tiempos a cada profundidad (ver profundiza) con los de
+    una corrida base
+
+    Devuelve (regresiones, cambios) como `compara`: es regresión que el
+    tiempo para completar una profundidad suba más de `umbral`, y sólo 
+    cambio que ya no se complete una profundidad que antes sí o que 
+    cambien sus nodos.
+
+    """
+    anteriores = {(r['juego'], r['posicion']): r for r in base}
+    regresiones, cambios = [], []
+    for r in resultados:
+        b = anteriores.get((r['juego'], r['posicion']))
+        if b == None:
+            continue
+        actuales = {p['d']: p for p in r['profundidades']}
+        for pb in b['profundidades']:
+            nombre = f"{r['juego']} {r['posicion']} d={pb['d']}"
+            p = actuales.get(pb['d'])
+            if p == None:
+                cambios.append(f"{nombre}: ya no se completa")
+                continue
+            if (pb['segundos'] >= minimo and 
+                p['segundos'] > (1 + umbral) * pb['segundos']):
+                regresiones.append(
+                    f"{nombre}: {p['segundos']:.3f} s para llegar, "
+                    f"antes {pb['segundos']:.3f}"
+                )
+            if p['nodos'] != pb['nodos']:
+                cambios.append(
+                    f"{nombre}: {p['nodos']} nodos, antes {pb['nodos']}"
+                )
+    return regresiones, cambios
+
+
+def imprime(resultados):
+    print(f"{'juego':18}{'posicion':10}{'algoritmo':11}{'d':>5}"
+          f"{'nodos':>10}{'segundos':>10}{'nodos/s':>10}  jugada")
+    for r in resultados:
+        print(f"{r['juego']:18}{r['posicion']:10}{r['algoritmo']:11}"
+              f"{str(r['d']):>5}{r['nodos']:>10}{r['segundos']:>10.3f}"
+              f"{r['nps']:>10.0f}  {r['jugada']}")
+
+
+def imprime_profundidades(resultados):
+    print(f"{'juego':18}{'posicion':10}{'d':>5}{'nodos':>10}"
+          f"{'segundos':>10}")
+    for r in resultados:
+        for p in r['profundidades']:
+            print(f"{r['juego']:18}{r['posicion']:10}{p['d']:>5}"
+                  f"{p['nodos']:>10}{p['segundos']:>10.3f}")
+
+
+if __name__ == '__main__':
+    from argparse import ArgumentParser
+    import sys
+
+    parser = ArgumentParser(description="Mide el desempeño de la búsqueda")
+    parser.add_argument('--juegos', nargs='*', choices=list(JUEGOS))
+    parser.add_argument('--algoritmos', nargs='*',
+                        choices=['negamax', 'alpha_beta', 'minimax'])
+    parser.add_argument('--repeticiones', type=int, default=1)
+    parser.add_argument('--semilla', type=int, default=0)
+    parser.add_argument('--salida', help="Archivo JSON para los resultados")
+    parser.add_argument('--base', help="Archivo JSON con qué comparar")
+    parser.add_argument('--umbral', type=float, default=0.1)
+    parser.add_argument('--profundidad', type=float, metavar='SEGUNDOS',
+                        help="Mide el tiempo a cada profundidad")
+    args = parser.parse_args()
+
+    # El JSON tiene las 'busquedas' (ver corre) y las 'profundidades' 
+    # (ver profundiza, vacía si no se pidió --profundidad)
+    resultados = {
+        'busquedas': corre(
+            args.juegos, args.algoritmos, args.repeticiones, args.semilla
+        ),
+        'profundidades': [],
+    }
+    imprime(resultados['busquedas'])
+    if args.profundidad:
+        resultados['profundidades'] = profundiza(
+            args.juegos, args.profundidad, args.semilla
+        )
+        print()
+        imprime_profundidades(resultados['profundidades'])
+    if args.salida:
+        with open(args.salida, 'w') as archivo:
+            json.dump(resultados, archivo, indent=1)
+    if args.base:
+        with open(args.base) as archivo:
+            base = json.load(archivo)
+        if isinstance(base, list):
+            # Archivos de antes, sólo con las búsquedas
+            base = {'busquedas': base, 'profundidades': []}
+        regresiones, cambios = compara(
+            resultados['busquedas'], base['busquedas'], args.umbral
+        )
+        r, c = compara_profundidades(
+            resultados['profundidades'], base['profundidades'], args.umbral
+        )
+        regresiones, cambios = regresiones + r, cambios + c
+        print()
+        for cambio in cambios:
+            print("CAMBIO:", cambio)
+        for regresion in regresiones:
+            print("REGRESIÓN:", regresion)
+        if regresiones:
+            sys.exit(1)
+        print("Sin regresiones")
@@ -24,14 +24,64 @@ fichas.
 La ganancia es 1 si gana el jugador 1, -1 si gana el jugador 2 y 0 si es un
 empate.
 
+También se ofrece `Conecta4Bits`, una versión del mismo juego donde el estado
+es una tupla `(x, o, alturas)`: `x` y `o` son enteros usados como tableros de
+bits con las fichas del jugador 1 y del jugador -1, y `alturas` es una tupla
+con el número de fichas en cada columna. El bit `7 * columna + fila` (con la
+fila 0 abajo) es una casilla; el séptimo bit de cada columna se deja siempre
+en cero para que los corrimientos no se pasen de una columna a otra.
+
+ 6 13 20 27 34 41 48
+ 5 12 19 26 33 40 47
+ 4 11 18 25 32 39 46
+ 3 10 17 24 31 38 45
+ 2  9 16 23 30 37 44
+ 1  8 15 22 29 36 43
+ 0  7 14 21 28 35 42
+
+`Conecta4Incremental` es igual a `Conecta4`, pero al buscar sobre un tablero
+mutable lleva la cuenta de las fichas en cada ventana de 4 casillas, para
+evaluar con `evalua_posibles_4con_inc` y `evalua_3con_inc` sin recorrer
+todo el tablero en cada hoja.
+
 """
 
 from juegos_simplificado import ModeloJuegoZT2
+from juegos_simplificado import Tablero
 from juegos_simplificado import juega_dos_jugadores
-from minimax import jugador_negamax
-from minimax import minimax_iterativo
+from juegos_simplificado import tabla_zobrist
+from juegos_simplificado import zobrist_simetrico
+from juegos_simplificado import canonica_empacada
+from minimax import Motor
+
+# Con simetrias=True las claves llevan empacada la del tablero reflejado
+# de izquierda a derecha, para que las posiciones reflejadas compartan 
+# entrada en la tabla de transposición
+ESPEJO = tuple(7 * (i // 7) + 6 - i % 7 for i in range(6 * 7))
+ZOBRIST, TURNO = tabla_zobrist(6 * 7)
+ZOBRIST_SIMETRICO, TURNO_SIMETRICO = zobrist_simetrico(
+    ZOBRIST, TURNO, (tuple(range(6 * 7)), ESPEJO)
+)
 
 class Conecta4(ModeloJuegoZT2):
+    """
+    Conecta 4 con el estado como tupla de 42 casillas
+
+    Parametros
+    ----------
+    simetrias (bool): Si es True, las posiciones reflejadas comparten 
+        entrada en la tabla de transposición. Ahorra nodos en la 
+        apertura, pero las claves de 128 bits hacen más lento cada nodo
+        y en el medio juego la búsqueda tarda más
+
+    """
+    def __init__(self, simetrias=False):
+        self.simetrias = simetrias
+        self.zobrist, self.turno = (
+            (ZOBRIST_SIMETRICO, TURNO_SIMETRICO) if simetrias 
+            else (ZOBRIST, TURNO)
+        )
+
     def inicializa(self):
         return (tuple([0 for _ in range(6 * 7)]), 1)
         
@@ -78,8 +128,214 @@ class Conecta4(ModeloJuegoZT2):
         if 0 not in s:
             return True
         return self.ganancia(s) != 0
-    
+
+    def expande(self, s, j):
+        g = self.ganancia(s)
+        jugadas = [columna for columna in range(7) if s[columna] == 0]
+        if g != 0 or not jugadas:
+            return True, g, []
+        return False, 0, jugadas
+
+    def clave(self, s, j):
+        clave = 0 if j == 1 else self.turno
+        for i in range(6 * 7):
+            if s[i] != 0:
+                clave ^= self.zobrist[s[i]][i]
+        return clave
+
+    def transicion_clave(self, s, clave, a, j):
+        s = list(s[:])
+        for i in range(5, -1, -1):
+            if s[a + 7 * i] == 0:
+                s[a + 7 * i] = j
+                clave ^= self.zobrist[j][a + 7 * i]
+                break
+        return tuple(s), clave ^ self.turno
+
+    def mutable(self, s, j):
+        return Tablero(s, self.clave(s, j))
+
+    def hace(self, m, a, j):
+        c = m.casillas
+        for i in range(5, -1, -1):
+            if c[a + 7 * i] == 0:
+                c[a + 7 * i] = j
+                m.clave ^= self.zobrist[j][a + 7 * i] ^ self.turno
+                m.pila.append(a + 7 * i)
+                break
+
+    def deshace(self, m):
+        c = m.casillas
+        i = m.pila.pop()
+        m.clave ^= self.zobrist[c[i]][i] ^ self.turno
+        c[i] = 0
+
+    def canonica(self, clave):
+        if not self.simetrias:
+            return clave, None
+        return canonica_empacada(clave, 2)
+
+    def transforma(self, a, t):
+        """
+        La simetría 1 es el reflejo izquierda-derecha
+
+        """
+        return a if t == 0 else 6 - a
+
+    def destransforma(self, a, t):
+        return a if t == 0 else 6 - a
+
+
+LLENO = sum(((1 << 6) - 1) << (7 * columna) for columna in range(7))
+ESPEJO_BITS = tuple(7 * (6 - i // 7) + i % 7 for i in range(7 * 7))
+# El turno tiene que salir de la misma tabla que las fichas: con la misma
+# semilla, el TURNO de la tabla de 42 casillas es el número de una ficha 
+# en la de 49
+ZOBRIST_BITS, TURNO_BITS = tabla_zobrist(7 * 7)
+ZOBRIST_BITS_SIMETRICO, TURNO_BITS_SIMETRICO = zobrist_simetrico(
+    ZOBRIST_BITS, TURNO_BITS, (tuple(range(7 * 7)), ESPEJO_BITS)
+)
+
+def cuatro_en_linea(b):
+    """
+    Devuelve True si en el tablero de bits b hay 4 fichas en línea
+
+    Para cada dirección (vertical, horizontal y las dos diagonales) se
+    marcan las fichas que tienen vecina en esa dirección, y luego las
+    parejas que tienen otra pareja a dos casillas.
+
+    """
+    for d in (1, 7, 6, 8):
+        m = b & (b >> d)
+        if m & (m >> 2 * d):
+            return True
+    return False
+
+
+class Conecta4Bits(ModeloJuegoZT2):
+    """
+    Conecta 4 con tableros de bits
+
+    Mismas reglas y acciones que `Conecta4`, pero hacer una jugada y
+    revisar si alguien ganó cuesta un número fijo de operaciones
+    con enteros. El parámetro simetrias es como en `Conecta4`.
+
+    """
+    def __init__(self, simetrias=False):
+        self.simetrias = simetrias
+        self.zobrist, self.turno = (
+            (ZOBRIST_BITS_SIMETRICO, TURNO_BITS_SIMETRICO) if simetrias 
+            else (ZOBRIST_BITS, TURNO_BITS)
+        )
+
+    def inicializa(self):
+        return ((0, 0, 7 * (0,)), 1)
+
+    def jugadas_legales(self, s, j):
+        return (columna for columna in range(7) if s[2][columna] < 6)
+
+    def transicion(self, s, a, j):
+        x, o, alturas = s
+        ficha = 1 << (7 * a + alturas[a])
+        alturas = alturas[:a] + (alturas[a] + 1,) + alturas[a + 1:]
+        return (x | ficha, o, alturas) if j == 1 else (x, o | ficha, alturas)
+
+    def ganancia(self, s):
+        if cuatro_en_linea(s[0]):
+            return 1
+        if cuatro_en_linea(s[1]):
+            return -1
+        return 0
+
+    def terminal(self, s):
+        return (
+            s[0] | s[1] == LLENO
+            or cuatro_en_linea(s[0])
+            or cuatro_en_linea(s[1])
+        )
+
+    def expande(self, s, j):
+        g = self.ganancia(s)
+        jugadas = [columna for columna in range(7) if s[2][columna] < 6]
+        if g != 0 or not jugadas:
+            return True, g, []
+        return False, 0, jugadas
+
+    def clave(self, s, j):
+        clave = 0 if j == 1 else self.turno
+        for jugador, b in ((1, s[0]), (-1, s[1])):
+            while b:
+                ficha = b & -b
+                clave ^= self.zobrist[jugador][ficha.bit_length() - 1]
+                b ^= ficha
+        return clave
+
+    def transicion_clave(self, s, clave, a, j):
+        clave ^= self.zobrist[j][7 * a + s[2][a]] ^ self.turno
+        return self.transicion(s, a, j), clave
+
+    def mutable(self, s, j):
+        return Tablero([s[0], s[1], list(s[2])], self.clave(s, j))
+
+    def inmutable(self, m):
+        c = m.casillas
+        return c[0], c[1], tuple(c[2])
+
+    def hace(self, m, a, j):
+        c = m.casillas
+        i = 7 * a + c[2][a]
+        if j == 1:
+            c[0] |= 1 << i
+        else:
+            c[1] |= 1 << i
+        c[2][a] += 1
+        m.clave ^= self.zobrist[j][i] ^ self.turno
+        m.pila.append(a)
+
+    def deshace(self, m):
+        c = m.casillas
+        a = m.pila.pop()
+        c[2][a] -= 1
+        i = 7 * a + c[2][a]
+        if c[0] >> i & 1:
+            c[0] ^= 1 << i
+            m.clave ^= self.zobrist[1][i] ^ self.turno
+        else:
+            c[1] ^= 1 << i
+            m.clave ^= self.zobrist[-1][i] ^ self.turno
+
+    def canonica(self, clave):
+        if not self.simetrias:
+            return clave, None
+        return canonica_empacada(clave, 2)
+
+    def transforma(self, a, t):
+        """
+        La simetría 1 es el reflejo izquierda-derecha
+
+        """
+        return a if t == 0 else 6 - a
+
+    def destransforma(self, a, t):
+        return a if t == 0 else 6 - a
+
+
+def bits_a_tupla(s):
+    """
+    Convierte un estado de `Conecta4Bits` al estado de 42 casillas
+    de `Conecta4`
+
+    """
+    x, o, _ = s
+    return tuple(
+        1 if x >> (7 * columna + 5 - fila) & 1 else
+        -1 if o >> (7 * columna + 5 - fila) & 1 else 0
+        for fila in range(6) for columna in range(7)
+    )
+
 def pprint_conecta4(s):
+    if len(s) == 3:
+        s = bits_a_tupla(s)
     a = [' X ' if x == 1 else ' O ' if x == -1 else '   ' 
          for x in s]
     print('\n 0 | 1 | 2 | 3 | 4 | 5 | 6')
@@ -217,11 +473,183 @@ def evalua_3con(s):
         print("ERROR, evaluación fuera de rango --> ", promedio)
     return promedio
 
+def evalua_3con_bits(s):
+    """
+    Evalua un estado de `Conecta4Bits` para el jugador 1
+
+    Da el mismo valor que `evalua_3con`: cuenta las mismas tercias 
+    (TERCIAS, incluyendo las diagonales que se salen del tablero en 
+    `evalua_3con`), pero con corrimientos sobre los tableros de bits.
+
+    """
+    conect3 = 0
+    for d1, d2, inicios in TERCIAS_BITS:
+        conect3 += (s[0] & (s[0] >> d1) & (s[0] >> d2) & inicios).bit_count()
+        conect3 -= (s[1] & (s[1] >> d1) & (s[1] >> d2) & inicios).bit_count()
+    return conect3 / (7 * 4 + 6 * 5 + 5 * 4 + 5 * 4)
+
+
+def _lineas_posibles_4con():
+    # Las mismas líneas que recorre evalua_posibles_4con, con las mismas
+    # casillas (aunque algunas diagonales quedan incompletas o repetidas)
+    lineas = [[7 * i + j for j in range(7)] for i in range(6)]
+    lineas += [[7 * i + j for i in range(6)] for j in range(7)]
+    for x in range(6):
+        i = (x - 2 if x > 1 else 7*(2-x))
+        lineas.append([i + j*8 for j in range(6 - abs(x - 2))])
+        i = (x + 3 if x < 4 else 7*x-22)
+        lineas.append([i + j*6 for j in range(6 - abs(x - 2))])
+    return lineas
+
+# Ventanas de 4 casillas que cuenta evalua_posibles_4con
+VENTANAS = tuple(
+    tuple(linea[k:k + 4]) 
+    for linea in _lineas_posibles_4con() for k in range(len(linea) - 3)
+)
+
+# Tercias de casillas que revisa evalua_3con, con las mismas fórmulas
+TERCIAS = tuple(
+    [(i + 7 * j, i + 7 * (j + 1), i + 7 * (j + 2)) 
+     for i in range(7) for j in range(4)]
+    + [(7 * i + j, 7 * i + j + 1, 7 * i + j + 2) 
+       for i in range(6) for j in range(5)]
+    + [(i + 7 * j, i + 7 * j + 8, i + 7 * j + 16) 
+       for i in range(5) for j in range(4)]
+    + [(i + 7 * j + 3, i + 7 * j + 9, i + 7 * j + 15) 
+       for i in range(5) for j in range(4)]
+)
+
+def _tercias_bits():
+    # Agrupa TERCIAS por los corrimientos entre sus bits en 
+    # `Conecta4Bits`, con la máscara de los bits donde empiezan
+    grupos = {}
+    for tercia in TERCIAS:
+        b0, b1, b2 = sorted(7 * (c % 7) + 5 - c // 7 for c in tercia)
+        grupos[b1 - b0, b2 - b0] = grupos.get((b1 - b0, b2 - b0), 0) | 1 << b0
+    return tuple((d1, d2, inicios) for (d1, d2), inicios in grupos.items())
+
+# Tercias de evalua_3con_bits: (corrimiento, corrimiento, inicios)
+TERCIAS_BITS = _tercias_bits()
+
+# Ventanas y tercias a las que pertenece cada casilla
+VENTANAS_CASILLA = tuple(
+    tuple(w for w, ventana in enumerate(VENTANAS) if c in ventana)
+    for c in range(6 * 7)
+)
+TERCIAS_CASILLA = tuple(
+    tuple(t for t, tercia in enumerate(TERCIAS) if c in tercia)
+    for c in range(6 * 7)
+)
+
+
+class Conteos:
+    """
+    Fichas de cada jugador en cada ventana de VENTANAS y en cada tercia
+    de TERCIAS
+
+    Se actualizan con `pon` y `quita` al poner y quitar una ficha, 
+    junto con los totales que usan las evaluaciones:
+
+    posibles: ventanas sin fichas de -1 menos ventanas sin fichas de 1
+        (el numerador de evalua_posibles_4con)
+    conect3: tercias llenas de 1 menos tercias llenas de -1
+        (el numerador de evalua_3con)
+
+    """
+    __slots__ = ('ventanas', 'tercias', 'posibles', 'conect3')
+
+    def __init__(self, s):
+        self.ventanas = {1: [0] * len(VENTANAS), -1: [0] * len(VENTANAS)}
+        self.tercias = {1: [0] * len(TERCIAS), -1: [0] * len(TERCIAS)}
+        self.posibles, self.conect3 = 0, 0
+        for c in range(6 * 7):
+            if s[c] != 0:
+                self.pon(c, s[c])
+
+    def pon(self, c, j):
+        propias = self.ventanas[j]
+        for w in VENTANAS_CASILLA[c]:
+            if propias[w] == 0:
+                # La ventana ya no es posible para el rival
+                self.posibles += j
+            propias[w] += 1
+        propias = self.tercias[j]
+        for t in TERCIAS_CASILLA[c]:
+            propias[t] += 1
+            if propias[t] == 3:
+                self.conect3 += j
+
+    def quita(self, c, j):
+        propias = self.ventanas[j]
+        for w in VENTANAS_CASILLA[c]:
+            propias[w] -= 1
+            if propias[w] == 0:
+                self.posibles -= j
+        propias = self.tercias[j]
+        for t in TERCIAS_CASILLA[c]:
+            if propias[t] == 3:
+                self.conect3 -= j
+            propias[t] -= 1
+
+
+class Conecta4Incremental(Conecta4):
+    """
+    Conecta 4 que, al buscar sobre un tablero mutable, lleva la cuenta
+    de las fichas en cada ventana y tercia
+
+    Las casillas del tablero mutable son las 42 del estado más los 
+    `Conteos` en la posición 42, que se actualizan en `hace` y 
+    `deshace`. Así `evalua_posibles_4con_inc` y `evalua_3con_inc` 
+    regresan lo mismo que `evalua_posibles_4con` y `evalua_3con` sin
+    recorrer el tablero.
+
+    """
+    def mutable(self, s, j):
+        return Tablero(list(s) + [Conteos(s)], self.clave(s, j))
+
+    def hace(self, m, a, j):
+        Conecta4.hace(self, m, a, j)
+        m.casillas[42].pon(m.pila[-1], j)
+
+    def deshace(self, m):
+        i = m.pila[-1]
+        m.casillas[42].quita(i, m.casillas[i])
+        Conecta4.deshace(self, m)
+
+    def inmutable(self, m):
+        # Los Conteos cambian con las jugadas que siguen
+        return tuple(m.casillas[:42])
+
+
+def evalua_posibles_4con_inc(s):
+    """
+    Igual que evalua_posibles_4con, pero con los conteos de un tablero
+    de `Conecta4Incremental`
+
+    """
+    if len(s) == 6 * 7:
+        return evalua_posibles_4con(s)
+    return s[42].posibles / 69
+
+def evalua_3con_inc(s):
+    """
+    Igual que evalua_3con, pero con los conteos de un tablero de
+    `Conecta4Incremental`
+
+    """
+    if len(s) == 6 * 7:
+        return evalua_3con(s)
+    return s[42].conect3 / (7 * 4 + 6 * 5 + 5 * 4 + 5 * 4)
+
 
     
 if __name__ == '__main__':
+    from os.path import exists
+    from libro import Libro
 
-    modelo = Conecta4()
+    modelo = Conecta4Incremental()
+    # Libro de aperturas hecho con: python libro.py conecta4
+    libro = Libro('libro_conecta4.bin') if exists('libro_conecta4.bin') else None
     print("="*40 + "\n" + "EL JUEGO DE CONECTA 4".center(40) + "\n" + "="*40)
     
     jugs = []
@@ -240,18 +668,25 @@ if __name__ == '__main__':
             d = None
             while type(d) != int or d < 1:
                 d = int(input("Profundidad: "))
-            jugs.append(lambda juego, s, j: jugador_negamax(
-                juego, s, j, ordena=ordena_centro, evalua=evalua_3con, d=d)
+            jugs.append(
+                Motor(ordena=ordena_centro, evalua=evalua_3con_inc, d=d,
+                      libro=libro)
             )
         else:
             t = None
             while type(t) != int or t < 1:
                 t = int(input("Tiempo: "))
-            jugs.append(lambda juego, s, j: minimax_iterativo(
-                juego, s, j, ordena=ordena_centro, evalua=evalua_3con, tiempo=t)
+            jugs.append(
+                Motor(ordena=ordena_centro, evalua=evalua_3con_inc, 
+                      tiempo=t, libro=libro)
             )
 
-    g, s_final = juega_dos_jugadores(modelo, jugs[0], jugs[1])
+    # Sólo se pondera contra el jugador manual, para no quitarle tiempo
+    # a otro motor
+    g, s_final = juega_dos_jugadores(
+        modelo, jugs[0], jugs[1], 
+        pondera=jugador_manual_conecta4 in jugs
+    )
     print("\nSE ACABO EL JUEGO\n")
     pprint_conecta4(s_final)
     if g != 0:
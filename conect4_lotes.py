@@ -0,0 +1,122 @@
+"""
+Evaluación por lotes de conecta 4 con NumPy
+
+Las posiciones se apilan en un arreglo de (N, 6, 7) enteros de 8 bits,
+con las casillas en el mismo orden que el estado de `Conecta4`, y se
+cuentan a la vez las fichas de cada jugador en todas las ventanas de
+todas las posiciones. Las ventanas de 4 casillas y las tercias son las
+de `conect4.VENTANAS` y `conect4.TERCIAS`, así que las evaluaciones
+dan lo mismo que `evalua_posibles_4con` y `evalua_3con`.
+
+Sirven como `evalua_lotes` de negamax, que junta las hojas de los
+últimos niveles de la búsqueda y las evalúa con una sola llamada:
+
+    negamax_en_sitio(
+        Conecta4(), s, 1, ordena=ordena_centro, d=8,
+        evalua_lotes=evalua_3con_lotes
+    )
+
+o para evaluar muchas posiciones guardadas:
+
+    valores = evalua_3con_lotes(a_arreglo(posiciones))
+
+Este módulo usa NumPy (pip install numpy) si está instalado; si no,
+las evaluaciones por lotes evalúan los estados uno por uno con las
+funciones de `conect4`, con el mismo resultado, y `a_arreglo` y
+`fichas` lanzan ImportError. El resto de los módulos no usan NumPy.
+
+"""
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from conect4 import VENTANAS, TERCIAS, bits_a_tupla
+from conect4 import evalua_posibles_4con, evalua_3con
+
+if np != None:
+    _VENTANAS = np.array(VENTANAS)
+    _TERCIAS = np.array(TERCIAS)
+
+
+def _necesita_numpy():
+    if np == None:
+        raise ImportError("Se necesita NumPy (pip install numpy)")
+
+
+def _tupla(s):
+    return bits_a_tupla(s) if len(s) == 3 else tuple(s[:6 * 7])
+
+
+def a_arreglo(estados):
+    """
+    Convierte una lista de estados a un arreglo de (N, 6, 7) int8
+
+    Los estados pueden ser de `Conecta4` (sólo se usan las primeras 42
+    casillas, así que también sirven las casillas de un tablero de
+    `Conecta4Incremental`) o de `Conecta4Bits`.
+
+    """
+    _necesita_numpy()
+    filas = [_tupla(s) for s in estados]
+    return np.array(filas, dtype=np.int8).reshape(-1, 6, 7)
+
+
+def fichas(tableros, grupos):
+    """
+    Cuenta las fichas de cada jugador en cada grupo de casillas
+
+    Parametros
+    ----------
+    tableros (np.ndarray): Arreglo de (N, 6, 7)
+    grupos (np.ndarray): Arreglo de (G, k) con índices de casillas
+
+    Regresa
+    -------
+    tuple: (fichas del jugador 1, fichas del jugador -1), dos
+        arreglos de (N, G)
+
+    """
+    _necesita_numpy()
+    casillas = tableros.reshape(len(tableros), 6 * 7)[:, grupos]
+    return (casillas == 1).sum(axis=2), (casillas == -1).sum(axis=2)
+
+
+def _como_entrada(estados, valores):
+    # Si se recibió una lista se regresa una lista de float, como 
+    # espera negamax; si se recibió un arreglo, un arreglo
+    if isinstance(estados, np.ndarray):
+        return valores
+    return valores.tolist()
+
+
+def evalua_posibles_4con_lotes(estados):
+    """
+    evalua_posibles_4con para una lista de estados o un arreglo de
+    (N, 6, 7)
+
+    """
+    if np == None:
+        return [evalua_posibles_4con(_tupla(s)) for s in estados]
+    tableros = (estados if isinstance(estados, np.ndarray) 
+                else a_arreglo(estados))
+    unos, menos = fichas(tableros, _VENTANAS)
+    conexiones = (menos == 0).sum(axis=1) - (unos == 0).sum(axis=1)
+    return _como_entrada(estados, conexiones / 69)
+
+
+def evalua_3con_lotes(estados):
+    """
+    evalua_3con para una lista de estados o un arreglo de (N, 6, 7)
+
+    """
+    if np == None:
+        return [evalua_3con(_tupla(s)) for s in estados]
+    tableros = (estados if isinstance(estados, np.ndarray) 
+                else a_arreglo(estados))
+    unos, menos = fichas(tableros, _TERCIAS)
+    conect3 = (unos == 3).sum(axis=1) - (menos == 3).sum(axis=1)
+    return _como_entrada(
+        estados, conect3 / (7 * 4 + 6 * 5 + 5 * 4 + 5 * 4)
+    )
@@ -1,12 +1,26 @@
 """
 El juego del gato para ilustrar los modelos de juegos
 
+Además del jugador minimax se ofrece `jugador_perfecto_gato`, que consulta 
+una tabla con el valor y la mejor jugada de todas las posiciones del gato. 
+Como el tablero tiene 8 simetrías (4 rotaciones, con y sin reflejo), sólo 
+se guarda la posición canónica de cada clase: la de menor código en base 3.
+La tabla se calcula en memoria la primera vez que se usa (tarda una 
+décima de segundo); con `tabla_gato(archivo)` se puede guardar y leer de 
+un archivo.
+
 """
 
+from os import path
+from zlib import crc32
 from juegos_simplificado import ModeloJuegoZT2
+from juegos_simplificado import Tablero
 from juegos_simplificado import juega_dos_jugadores
 from juegos_simplificado import minimax
-from minimax import jugador_negamax
+from juegos_simplificado import tabla_zobrist
+from juegos_simplificado import simetrias_cuadrado
+
+ZOBRIST, TURNO = tabla_zobrist(9)
 
 class Gato(ModeloJuegoZT2):
     """
@@ -71,6 +85,52 @@ class Gato(ModeloJuegoZT2):
             if s[i] == s[i + 3] == s[i + 6] != 0:
                 return s[i]
         return 0    
+
+    def clave(self, s, j):
+        """
+        Devuelve la clave de Zobrist del estado s con el jugador j en turno
+
+        """
+        clave = 0 if j == 1 else TURNO
+        for i in range(9):
+            if s[i] != 0:
+                clave ^= ZOBRIST[s[i]][i]
+        return clave
+
+    def transicion_clave(self, s, clave, a, j):
+        """
+        Devuelve el estado y la clave que resultan de realizar la jugada a
+        en el estado s para el jugador j
+
+        """
+        return self.transicion(s, a, j), clave ^ ZOBRIST[j][a] ^ TURNO
+
+    def mutable(self, s, j):
+        """
+        Devuelve el estado s como un Tablero para hacer y deshacer jugadas
+
+        """
+        return Tablero(s, self.clave(s, j))
+
+    def hace(self, m, a, j):
+        """
+        Realiza la jugada a del jugador j en el Tablero m
+
+        """
+        c = m.casillas
+        c[a] = j
+        m.clave ^= ZOBRIST[j][a] ^ TURNO
+        m.pila.append(a)
+
+    def deshace(self, m):
+        """
+        Deshace la última jugada hecha en el Tablero m
+
+        """
+        c = m.casillas
+        a = m.pila.pop()
+        m.clave ^= ZOBRIST[c[a]][a] ^ TURNO
+        c[a] = 0
     
 def pprint_gato(s):
     """
@@ -107,6 +167,125 @@ def jugador_minimax_gato(juego, s, j):
     """
     return minimax(juego, s, j)
 
+
+SIMETRIAS = simetrias_cuadrado(3)
+
+# PESOS[t][k]: valor en base 3 de la casilla k del original en el código
+# del tablero transformado con la simetría t
+PESOS = tuple(tuple(3**p.index(k) for k in range(9)) for p in SIMETRIAS)
+
+# Archivo con la tabla: la cabecera, el CRC-32 de la tabla (4 bytes, 
+# little endian) y un byte por cada código en base 3 (3^9 bytes)
+CABECERA = b'GATO\x01'
+SIN_JUGADA = 15
+VACIO = 255
+
+
+def canonico(s):
+    """
+    Devuelve (código, simetría) de la posición canónica de s: el menor 
+    código en base 3 (0 vacío, 1 para 1, 2 para -1) entre las 8 
+    simetrías, y la simetría de SIMETRIAS con la que se obtiene
+
+    """
+    digitos = [x % 3 for x in s]
+    return min(
+        (sum(map(int.__mul__, pesos, digitos)), t)
+        for t, pesos in enumerate(PESOS)
+    )
+
+
+def construye_tabla_gato():
+    """
+    Calcula la tabla del gato con negamax sobre las posiciones canónicas
+
+    Cada byte de la tabla corresponde a un código en base 3. Si la 
+    posición es canónica y se puede alcanzar, los dos bits bajos guardan 
+    el valor + 1 para el jugador en turno, y los cuatro siguientes la 
+    mejor jugada en la posición canónica (SIN_JUGADA si es terminal). 
+    Los demás bytes valen VACIO.
+
+    Regresa
+    -------
+    bytearray: La tabla, de 3^9 bytes
+
+    """
+    juego = Gato()
+    tabla = bytearray([VACIO]) * 3**9
+
+    def resuelve(s, j):
+        codigo, t = canonico(s)
+        if tabla[codigo] != VACIO:
+            return (tabla[codigo] & 3) - 1
+        if juego.terminal(s):
+            v, mejor = j * juego.ganancia(s), SIN_JUGADA
+        else:
+            v, mejor = -2, None
+            for a in juego.jugadas_legales(s, j):
+                v2 = -resuelve(juego.transicion(s, a, j), -j)
+                if v2 > v:
+                    v, mejor = v2, SIMETRIAS[t].index(a)
+        tabla[codigo] = (v + 1) | (mejor << 2)
+        return v
+
+    resuelve(*juego.inicializa())
+    return tabla
+
+
+def tabla_gato(archivo=None):
+    """
+    Calcula la tabla del gato, o la lee del archivo si se da uno
+
+    Si el archivo no existe o no es válido (otra cabecera, otro tamaño o
+    un CRC que no coincide), se calcula la tabla y se intenta guardar 
+    en él; si no se puede escribir, sólo se regresa.
+
+    """
+    if archivo != None and path.exists(archivo):
+        with open(archivo, 'rb') as entrada:
+            datos = entrada.read()
+        n = len(CABECERA)
+        tabla = datos[n + 4:]
+        if (datos[:n] == CABECERA and len(tabla) == 3**9 and 
+            int.from_bytes(datos[n:n + 4], 'little') == crc32(tabla)):
+            return tabla
+    tabla = bytes(construye_tabla_gato())
+    if archivo != None:
+        try:
+            with open(archivo, 'wb') as salida:
+                salida.write(
+                    CABECERA + crc32(tabla).to_bytes(4, 'little') + tabla
+                )
+        except OSError:
+            pass
+    return tabla
+
+_tabla = None
+
+def jugador_perfecto_gato(juego, s, j):
+    """
+    Jugador para el juego del gato que juega perfecto consultando la 
+    tabla de posiciones canónicas
+
+    """
+    global _tabla
+    if _tabla == None:
+        _tabla = tabla_gato()
+    codigo, t = canonico(s)
+    return SIMETRIAS[t][_tabla[codigo] >> 2]
+
+
+def valor_gato(s, j):
+    """
+    Devuelve el valor exacto de la posición s para el jugador j en turno
+    (1 gana, 0 empate, -1 pierde)
+
+    """
+    global _tabla
+    if _tabla == None:
+        _tabla = tabla_gato()
+    return (_tabla[canonico(s)[0]] & 3) - 1
+
     
 def juega_gato(jugador='X'):
     """
@@ -122,10 +301,14 @@ def juega_gato(jugador='X'):
     
     if jugador == 'X':
         #g, s = juega_dos_jugadores(juego, jugador_manual_gato, jugador_minimax_gato)
-        g, s = juega_dos_jugadores(juego, jugador_manual_gato, jugador_negamax)
+        g, s = juega_dos_jugadores(
+            juego, jugador_manual_gato, jugador_perfecto_gato
+        )
     else:
         #g, s = juega_dos_jugadores(juego, jugador_minimax_gato, jugador_manual_gato)
-        g, s = juega_dos_jugadores(juego, jugador_negamax, jugador_manual_gato)
+        g, s = juega_dos_jugadores(
+            juego, jugador_perfecto_gato, jugador_manual_gato
+        )
     
     print("\nSE ACABO EL JUEGO\n")
     pprint_gato(s)   
@@ -6,6 +6,7 @@ Vamos a usar una orientación funcional en este modulo
 """
 
 from random import shuffle
+from random import Random
     
 class ModeloJuegoZT2:
     """
@@ -54,21 +55,260 @@ class ModeloJuegoZT2:
         """
         raise NotImplementedError("Hay que desarrollar este método, pues")
 
+    def expande(self, s, j):
+        """
+        Devuelve (terminal, ganancia, jugadas) para el estado s con el 
+        jugador j en turno, donde ganancia es la ganancia para el jugador
+        1 si el estado es terminal, y jugadas es la lista de jugadas 
+        legales si no lo es.
+        
+        Por omisión se usan terminal, ganancia y jugadas_legales; los 
+        juegos donde esos métodos repiten trabajo pueden calcular todo 
+        de una vez.
+        
+        """
+        if self.terminal(s):
+            return True, self.ganancia(s), []
+        return False, 0, list(self.jugadas_legales(s, j))
+
+    def clave(self, s, j):
+        """
+        (Opcional) Devuelve un entero que identifica al estado s con el 
+        jugador j en turno, típicamente una clave de Zobrist. Si el juego
+        lo desarrolla, las tablas de transposición usan la clave en lugar
+        del estado.
+        
+        """
+        raise NotImplementedError("Este juego no tiene claves")
+
+    def transicion_clave(self, s, clave, a, j):
+        """
+        Devuelve (s2, clave2) donde s2 es el estado que resulta de realizar 
+        la jugada a en el estado s para el jugador j, y clave2 es su clave.
+        
+        Por omisión se calcula la clave de s2 desde cero; los juegos que 
+        usan claves de Zobrist la actualizan a partir de clave.
+        
+        """
+        s2 = self.transicion(s, a, j)
+        return s2, self.clave(s2, -j)
+
+    def mutable(self, s, j):
+        """
+        (Opcional) Devuelve un Tablero con el estado s y el jugador j en 
+        turno, sobre el que se hacen y deshacen jugadas con `hace` y 
+        `deshace`. Los juegos que lo desarrollan también deben tener
+        claves, y sus métodos jugadas_legales, terminal y ganancia deben
+        funcionar igual con m.casillas que con el estado.
+        
+        """
+        raise NotImplementedError("Este juego no tiene estado mutable")
+
+    def hace(self, m, a, j):
+        """
+        (Opcional) Realiza en su lugar la jugada a del jugador j sobre el 
+        Tablero m, actualizando m.clave y guardando en m.pila lo necesario
+        para deshacerla
+        
+        """
+        raise NotImplementedError("Este juego no tiene estado mutable")
+
+    def deshace(self, m):
+        """
+        (Opcional) Deshace la última jugada hecha sobre el Tablero m
+        
+        """
+        raise NotImplementedError("Este juego no tiene estado mutable")
+
+    def inmutable(self, m):
+        """
+        Devuelve una copia del estado del Tablero m que no cambia al 
+        seguir haciendo y deshaciendo jugadas sobre m
+
+        Por omisión es la tupla de las casillas; los juegos que guardan 
+        en m.casillas algo más que el estado (objetos que se modifican 
+        en hace y deshace) deben regresar sólo el estado.
+
+        """
+        return tuple(m.casillas)
+
+    def canonica(self, clave):
+        """
+        (Opcional) Devuelve (clave canónica, t) para la clave de un 
+        estado, donde la clave canónica es la misma para todos los 
+        estados equivalentes por alguna simetría del tablero, y t es la 
+        simetría que lleva al estado a su forma canónica. Si el juego lo
+        desarrolla, las tablas de transposición usan la clave canónica, 
+        y guardan las jugadas transformadas con `transforma`. Un juego 
+        que sólo usa simetrías si se le pide regresa (clave, None) 
+        cuando no las usa.
+        
+        """
+        raise NotImplementedError("Este juego no tiene simetrías")
+
+    def transforma(self, a, t):
+        """
+        (Opcional) Devuelve la jugada que corresponde a la jugada a en 
+        el estado transformado con la simetría t
+        
+        """
+        raise NotImplementedError("Este juego no tiene simetrías")
+
+    def destransforma(self, a, t):
+        """
+        (Opcional) Inversa de transforma: devuelve la jugada del estado
+        original que corresponde a la jugada a del estado transformado 
+        con la simetría t
+        
+        """
+        raise NotImplementedError("Este juego no tiene simetrías")
+
 
-def juega_dos_jugadores(juego, jugador1, jugador2):
+class Tablero:
+    """
+    Estado mutable de un juego
+    
+    casillas es una lista con los mismos elementos que el estado, así 
+    que los métodos del juego y las funciones de evaluación la pueden 
+    consultar igual que a la tupla; clave es la clave del estado y pila
+    guarda la información para deshacer las jugadas.
+    
+    """
+    __slots__ = ('casillas', 'clave', 'pila')
+
+    def __init__(self, casillas, clave):
+        self.casillas = list(casillas)
+        self.clave = clave
+        self.pila = []
+
+
+def implementa(juego, metodo):
+    """
+    Devuelve True si el juego desarrolla el método opcional de 
+    ModeloJuegoZT2 con nombre metodo
+    
+    """
+    return getattr(type(juego), metodo) is not getattr(ModeloJuegoZT2, metodo)
+
+
+def tabla_zobrist(casillas, semilla=0):
+    """
+    Genera números aleatorios de 64 bits para claves de Zobrist
+    
+    Devuelve (tabla, turno), donde tabla[j][i] es el número de la ficha
+    del jugador j en la casilla i, y turno es el número que se agrega 
+    cuando le toca jugar al jugador -1. Con la misma semilla siempre se 
+    generan los mismos números, así que las claves no cambian de una 
+    ejecución a otra.
+    
+    """
+    aleatorio = Random(semilla)
+    tabla = {
+        j: [aleatorio.getrandbits(64) for _ in range(casillas)] 
+        for j in (1, -1)
+    }
+    return tabla, aleatorio.getrandbits(64)
+
+
+def simetrias_cuadrado(n):
+    """
+    Devuelve las 8 simetrías de un tablero de n x n (4 rotaciones, con 
+    y sin reflejo), empezando por la identidad
+
+    Cada simetría es una permutación p tal que la casilla i del tablero
+    transformado es la casilla p[i] del original, con las casillas 
+    numeradas por renglones.
+    
+    """
+    rota = tuple(n * (n - 1 - i % n) + i // n for i in range(n * n))
+    refleja = tuple(n * (i // n) + n - 1 - i % n for i in range(n * n))
+    simetrias = [tuple(range(n * n))]
+    for _ in range(3):
+        simetrias.append(tuple(simetrias[-1][k] for k in rota))
+    simetrias += [tuple(p[k] for k in refleja) for p in simetrias]
+    return tuple(simetrias)
+
+
+def zobrist_simetrico(tabla, turno, simetrias):
+    """
+    Empaca en cada número de Zobrist los números de la casilla en cada
+    uno de los tableros transformados
+    
+    Con las tablas que regresa, la clave de un estado (calculada o 
+    actualizada igual que siempre, con xor) tiene en los bits 
+    64t a 64t + 63 la clave del estado transformado con la simetría t, 
+    así que la clave de la identidad queda en los 64 bits bajos. Con
+    `canonica_empacada` se obtiene la clave canónica.
+    
+    Parametros
+    ----------
+    tabla, turno: Como los regresa tabla_zobrist
+    simetrias (list): Permutaciones como las de simetrias_cuadrado; la
+        primera debe ser la identidad
+    
+    Regresa
+    -------
+    tuple: (tabla, turno) empacados
+    
+    """
+    inversas = []
+    for p in simetrias:
+        inversa = [0] * len(p)
+        for i, k in enumerate(p):
+            inversa[k] = i
+        inversas.append(inversa)
+    empacada = {
+        j: [
+            sum(tabla[j][inversa[k]] << (64 * t) 
+                for t, inversa in enumerate(inversas))
+            for k in range(len(tabla[j]))
+        ]
+        for j in (1, -1)
+    }
+    return empacada, sum(turno << (64 * t) for t in range(len(simetrias)))
+
+
+MASCARA_64 = (1 << 64) - 1
+
+def canonica_empacada(clave, n):
+    """
+    Devuelve (menor clave, t) entre las n claves de 64 bits empacadas
+    en clave (ver zobrist_simetrico)
+    
+    """
+    return min(((clave >> (64 * t)) & MASCARA_64, t) for t in range(n))
+
+
+def juega_dos_jugadores(juego, jugador1, jugador2, pondera=False):
     """
     Juega un juego de dos jugadores
     
     juego: instancia de ModeloJuegoZT
     jugador1: función que recibe el estado y devuelve la jugada
     jugador2: función que recibe el estado y devuelve la jugada
+
+    pondera: si es True y un jugador tiene el método `pondera` (ver 
+    minimax.Motor), se llama después de cada una de sus jugadas, con el
+    estado y el rival en turno, para que busque mientras piensa el 
+    rival; y si tiene `detiene`, se llama al terminar el juego. Sólo 
+    conviene contra un jugador humano o externo: se pondera en otro 
+    hilo del mismo proceso, que le quitaría tiempo de cómputo a otro 
+    motor que esté buscando.
     
     """
     s, j = juego.inicializa()
     while not juego.terminal(s):
-        a = jugador1(juego, s, j) if j == 1 else jugador2(juego, s, j)
+        jugador, rival = (jugador1, jugador2) if j == 1 else (jugador2, jugador1)
+        a = jugador(juego, s, j)
         s = juego.transicion(s, a, j)
         j = -j
+        if (pondera and hasattr(jugador, 'pondera') and 
+            jugador is not rival and not juego.terminal(s)):
+            jugador.pondera(juego, s, j)
+    if pondera:
+        for jugador in (jugador1, jugador2):
+            if hasattr(jugador, 'detiene'):
+                jugador.detiene()
     return juego.ganancia(s), s
 
 
@@ -0,0 +1,232 @@
+"""
+Libros de aperturas
+
+Todas las partidas empiezan en el mismo estado, así que las primeras
+jugadas se pueden buscar una sola vez, con más profundidad de la que se
+alcanza durante el juego, y guardarse en un archivo.
+
+El archivo es una lista de registros de 16 bytes ordenada por clave:
+
+    clave (entero de 64 bits sin signo): juego.clave(estado, jugador)
+    jugada (entero de 16 bits sin signo): posición de la mejor jugada en
+        list(juego.jugadas_legales(estado, jugador))
+    valor (flotante de 32 bits): valor de negamax para el jugador en turno
+
+Para consultarlo, `Libro` abre el archivo con mmap y hace una búsqueda
+binaria sobre los registros, así que abrirlo no cuesta nada aunque el
+libro sea grande, y sólo se leen del disco las páginas que se visitan.
+
+Uso:
+
+    python libro.py conecta4 --plies 4 --profundidad 10
+
+y para jugar con el libro:
+
+    motor = Motor(ordena=ordena_centro, evalua=evalua_3con, tiempo=5,
+                  libro=Libro('libro_conecta4.bin'))
+
+"""
+
+from mmap import mmap, ACCESS_READ
+from struct import Struct
+from time import time
+
+from juegos_simplificado import implementa
+from minimax import negamax_en_sitio, negamax_iterativo
+from minimax import TablaTransposicion, Heuristicas
+
+REGISTRO = Struct('<QHxxf')
+CLAVE = Struct('<Q')
+
+# Las claves se guardan con 64 bits
+MASCARA = (1 << 64) - 1
+
+
+def posiciones(juego, plies):
+    """
+    Devuelve la lista de (estado, jugador) no terminales a las que se
+    llega desde el estado inicial con a lo más plies jugadas, sin
+    repetir claves
+
+    """
+    s, j = juego.inicializa()
+    vistas = {juego.clave(s, j) & MASCARA}
+    nivel, resultado = [(s, j)], []
+    for p in range(plies + 1):
+        siguiente = []
+        for s, j in nivel:
+            if juego.terminal(s):
+                continue
+            resultado.append((s, j))
+            if p == plies:
+                continue
+            for a in juego.jugadas_legales(s, j):
+                hijo = juego.transicion(s, a, j)
+                clave = juego.clave(hijo, -j) & MASCARA
+                if clave not in vistas:
+                    vistas.add(clave)
+                    siguiente.append((hijo, -j))
+        nivel = siguiente
+    return resultado
+
+
+def construye(
+    juego, archivo, plies=4, d=None, tiempo=None, ordena=None,
+    evalua=None, entradas=2**20, informe=None
+    ):
+    """
+    Busca la mejor jugada de cada posición de las primeras plies
+    jugadas y escribe el libro en archivo
+
+    Todas las búsquedas comparten la tabla de transposición.
+
+    Parametros
+    ----------
+    juego (ModeloJuegoZT2): Modelo del juego; debe tener clave
+    archivo (str): Archivo de salida
+    plies (int): Número de jugadas desde el estado inicial
+    d (int): Profundidad de cada búsqueda. Si tiempo no es None,
+        profundidad máxima
+    tiempo (float): Si no es None, cada posición se busca con
+        negamax_iterativo con ese tiempo
+    entradas (int): Tamaño de la tabla de transposición
+    informe (function): Si no es None, se llama con (número de
+        posición, total, estado, jugada, valor) después de cada búsqueda
+
+    Regresa
+    -------
+    int: Número de registros escritos
+
+    """
+    if not implementa(juego, 'clave'):
+        raise ValueError("El juego necesita clave para tener libro")
+    transp = TablaTransposicion(entradas)
+    heuristicas = Heuristicas()
+    lista = posiciones(juego, plies)
+    registros = []
+    for n, (s, j) in enumerate(lista):
+        transp.envejece()
+        if tiempo != None:
+            traza, v = negamax_iterativo(
+                juego, s, j, tiempo=tiempo, ordena=ordena, d=d,
+                evalua=evalua, transp=transp, heuristicas=heuristicas
+            )
+        else:
+            traza, v = negamax_en_sitio(
+                juego, s, j, ordena=ordena, d=d, evalua=evalua,
+                transp=transp, traza=[], heuristicas=heuristicas
+            )
+        jugadas = list(juego.jugadas_legales(s, j))
+        clave = juego.clave(s, j) & MASCARA
+        registros.append((clave, jugadas.index(traza[0]), v))
+        if informe != None:
+            informe(n + 1, len(lista), s, traza[0], v)
+    registros.sort()
+    with open(archivo, 'wb') as salida:
+        for registro in registros:
+            salida.write(REGISTRO.pack(*registro))
+    return len(registros)
+
+
+class Libro:
+    """
+    Libro de aperturas guardado en un archivo hecho con `construye`
+
+    Hay que cerrarlo con `cierra` o usarlo con `with`.
+
+    Parametros
+    ----------
+    archivo (str): Archivo del libro
+
+    """
+    def __init__(self, archivo):
+        self.archivo = open(archivo, 'rb')
+        self.n = 0
+        self.datos = None
+        largo = self.archivo.seek(0, 2)
+        if largo > 0:
+            self.datos = mmap(self.archivo.fileno(), 0, access=ACCESS_READ)
+            self.n = largo // REGISTRO.size
+
+    def __len__(self):
+        return self.n
+
+    def busca(self, clave):
+        """
+        Devuelve (índice de la jugada, valor) para la clave, o None si
+        no está en el libro
+
+        """
+        clave &= MASCARA
+        inf, sup = 0, self.n
+        while inf < sup:
+            medio = (inf + sup) // 2
+            actual, = CLAVE.unpack_from(self.datos, medio * REGISTRO.size)
+            if actual < clave:
+                inf = medio + 1
+            else:
+                sup = medio
+        if inf == self.n:
+            return None
+        clave_libro, indice, valor = REGISTRO.unpack_from(
+            self.datos, inf * REGISTRO.size
+        )
+        return (indice, valor) if clave_libro == clave else None
+
+    def jugada(self, juego, estado, jugador):
+        """
+        Devuelve (jugada, valor) para el jugador en el estado, o None si
+        el estado no está en el libro
+
+        """
+        encontrado = self.busca(juego.clave(estado, jugador))
+        if encontrado == None:
+            return None
+        indice, valor = encontrado
+        jugadas = list(juego.jugadas_legales(estado, jugador))
+        if indice >= len(jugadas):
+            return None
+        return jugadas[indice], valor
+
+    def cierra(self):
+        if self.datos != None:
+            self.datos.close()
+        self.archivo.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.cierra()
+
+
+if __name__ == '__main__':
+    from argparse import ArgumentParser
+
+    parser = ArgumentParser(description="Construye un libro de aperturas")
+    parser.add_argument('juego', choices=['conecta4', 'otello'])
+    parser.add_argument('--plies', type=int, default=4)
+    parser.add_argument('--profundidad', type=int, default=8)
+    parser.add_argument('--tiempo', type=float, default=None)
+    parser.add_argument('--salida', default=None)
+    args = parser.parse_args()
+
+    if args.juego == 'conecta4':
+        from conect4 import Conecta4Incremental, ordena_centro
+        from conect4 import evalua_3con_inc
+        juego = Conecta4Incremental()
+        ordena, evalua = ordena_centro, evalua_3con_inc
+    else:
+        from otello import OtelloBits, ordenar, evaluar_bits
+        juego, ordena, evalua = OtelloBits(), ordenar, evaluar_bits
+    archivo = args.salida or f"libro_{args.juego}.bin"
+
+    t0 = time()
+    def informe(n, total, s, a, v):
+        print(f"{n}/{total} {a} {v:+.3f} ({time() - t0:.1f}s)", flush=True)
+
+    n = construye(
+        juego, archivo, args.plies, args.profundidad, args.tiempo,
+        ordena, evalua, informe=informe
+    )
+    print(f"{n} posiciones en {archivo}")
@@ -0,0 +1,415 @@
+"""
+Búsqueda de árbol Monte Carlo (MCTS) con UCT
+
+En lugar de evaluar las hojas con una función hecha a mano, cada
+iteración baja por el árbol eligiendo con UCT (el mejor promedio más un
+bono para las jugadas poco visitadas), agrega los hijos del nodo al que
+llega, juega desde ahí una partida rápida (playout) con una política
+sencilla, y sube el resultado por el camino. La jugada que se elige es
+la más visitada de la raíz. Sirve con cualquier ModeloJuegoZT2, pues
+sólo usa expande y transicion.
+
+El árbol se guarda en arreglos (ver `Arbol`), y `MotorMCTS` lo conserva
+de un turno a otro: si el estado que recibe está en el árbol (la jugada
+propia y la del rival), sigue buscando desde ese subárbol.
+
+Igual que con `minimax_iterativo`, se le da el tiempo en segundos:
+
+    juega_dos_jugadores(
+        OtelloBits(), MotorMCTS(tiempo=3, ordena=ordenar), jugador_manual
+    )
+
+Con `procesos` se buscan árboles independientes en otros procesos
+(paralelismo en la raíz) y se suman las visitas de las jugadas de la
+raíz.
+
+"""
+
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from math import log, sqrt
+from random import random, choice, seed
+from time import time
+
+
+class Arbol:
+    """
+    Árbol de búsqueda guardado en arreglos
+
+    El nodo k ocupa la posición k de cada arreglo: `jugadas[k]` es la
+    jugada que lleva del padre al nodo, `padre[k]` es el padre,
+    `visitas[k]` las veces que se pasó por el nodo y `valor[k]` la suma
+    de las ganancias para el jugador que hizo la jugada. Al expandir un
+    nodo se agregan todos sus hijos juntos, así que basta guardar el
+    índice del primero, `primero[k]`, y cuántos son, `num_hijos[k]`.
+    `primero[k]` vale SIN_EXPANDIR si el nodo no se ha expandido y
+    FINAL si su estado es terminal. La raíz es el nodo 0.
+
+    Los estados no se guardan: se calculan con transicion al bajar por
+    el árbol desde `estado`, el de la raíz.
+
+    """
+    SIN_EXPANDIR = -1
+    FINAL = -2
+
+    def __init__(self, estado, jugador):
+        self.estado = estado
+        self.jugador = jugador
+        self.jugadas = [None]
+        self.padre = array('i', [-1])
+        self.primero = array('i', [Arbol.SIN_EXPANDIR])
+        self.num_hijos = array('i', [0])
+        self.visitas = array('l', [0])
+        self.valor = array('d', [0.0])
+
+    def __len__(self):
+        return len(self.jugadas)
+
+    def expande(self, k, jugadas):
+        """
+        Agrega los hijos del nodo k, uno por jugada
+
+        """
+        self.primero[k] = len(self.jugadas)
+        self.num_hijos[k] = len(jugadas)
+        n = len(jugadas)
+        self.jugadas.extend(jugadas)
+        self.padre.extend(n * [k])
+        self.primero.extend(n * [Arbol.SIN_EXPANDIR])
+        self.num_hijos.extend(n * [0])
+        self.visitas.extend(n * [0])
+        self.valor.extend(n * [0.0])
+
+    def hijos(self, k):
+        inicio = self.primero[k]
+        if inicio < 0:
+            return range(0)
+        return range(inicio, inicio + self.num_hijos[k])
+
+    def subarbol(self, k, estado, jugador):
+        """
+        Devuelve un Arbol nuevo con el subárbol del nodo k, cuyo estado
+        es `estado` con `jugador` en turno
+
+        """
+        nuevo = Arbol(estado, jugador)
+        nuevo.primero[0] = self.primero[k]
+        nuevo.num_hijos[0] = self.num_hijos[k]
+        nuevo.visitas[0] = self.visitas[k]
+        nuevo.valor[0] = self.valor[k]
+        # Se copia por niveles para que los hijos sigan juntos
+        pendientes, i = [(k, 0)], 0
+        while i < len(pendientes):
+            viejo, k_nuevo = pendientes[i]
+            i += 1
+            if self.primero[viejo] < 0:
+                nuevo.primero[k_nuevo] = self.primero[viejo]
+                continue
+            nuevo.expande(
+                k_nuevo, [self.jugadas[h] for h in self.hijos(viejo)]
+            )
+            for h, h_nuevo in zip(self.hijos(viejo), nuevo.hijos(k_nuevo)):
+                nuevo.visitas[h_nuevo] = self.visitas[h]
+                nuevo.valor[h_nuevo] = self.valor[h]
+                pendientes.append((h, h_nuevo))
+        return nuevo
+
+
+def aleatoria(juego, estado, jugador, jugadas):
+    """
+    Política de playout que elige cualquier jugada legal
+
+    """
+    return choice(jugadas)
+
+
+class PoliticaOrdenada:
+    """
+    Política de playout sesgada por una función de ordenamiento
+
+    Se recorren las jugadas en el orden de `ordena` y se elige cada una
+    con probabilidad `p`; si no se eligió ninguna, la última. Es una
+    clase y no una función anidada para poder mandarla a otros procesos.
+
+    Parametros
+    ----------
+    ordena (function): Funcion de ordenamiento (jugadas, jugador)
+    p (float): Probabilidad de elegir cada jugada
+
+    """
+    def __init__(self, ordena, p=0.5):
+        self.ordena = ordena
+        self.p = p
+
+    def __call__(self, juego, estado, jugador, jugadas):
+        jugadas = self.ordena(jugadas, jugador)
+        for a in jugadas[:-1]:
+            if random() < self.p:
+                return a
+        return jugadas[-1]
+
+
+def playout(juego, estado, jugador, politica=aleatoria):
+    """
+    Juega desde el estado hasta el final con la política y devuelve la
+    ganancia para el jugador 1
+
+    """
+    while True:
+        final, ganancia, jugadas = juego.expande(estado, jugador)
+        if final:
+            return ganancia
+        a = politica(juego, estado, jugador, jugadas)
+        estado = juego.transicion(estado, a, jugador)
+        jugador = -jugador
+
+
+def itera(juego, arbol, c=1.0, politica=aleatoria, ordena=None,
+          max_nodos=10**6):
+    """
+    Hace una iteración de MCTS sobre el árbol: selección con UCT,
+    expansión, playout y propagación del resultado
+
+    Parametros
+    ----------
+    c (float): Peso de la exploración en UCT
+    politica (function): Política de playout (juego, estado, jugador,
+        jugadas) -> jugada
+    ordena (function): Si no es None, los hijos se agregan en este
+        orden, que es en el que se prueban por primera vez
+    max_nodos (int): Con este número de nodos ya no se expande el árbol
+
+    """
+    primero, num_hijos = arbol.primero, arbol.num_hijos
+    visitas, valor, jugadas = arbol.visitas, arbol.valor, arbol.jugadas
+    estado, jugador = arbol.estado, arbol.jugador
+    k, camino = 0, [0]
+
+    # Selección
+    while primero[k] >= 0:
+        log_n = log(visitas[k]) if visitas[k] else 0.0
+        mejor, mejor_u = -1, -1e10
+        for h in range(primero[k], primero[k] + num_hijos[k]):
+            n = visitas[h]
+            if n == 0:
+                mejor = h
+                break
+            u = valor[h] / n + c * sqrt(log_n / n)
+            if u > mejor_u:
+                mejor, mejor_u = h, u
+        k = mejor
+        estado = juego.transicion(estado, jugadas[k], jugador)
+        jugador = -jugador
+        camino.append(k)
+
+    # Expansión y playout
+    final, ganancia, legales = juego.expande(estado, jugador)
+    if final:
+        primero[k] = Arbol.FINAL
+    else:
+        if len(arbol) < max_nodos:
+            if ordena != None:
+                legales = ordena(legales, jugador)
+            arbol.expande(k, list(legales))
+            k = primero[k]
+            estado = juego.transicion(estado, jugadas[k], jugador)
+            jugador = -jugador
+            camino.append(k)
+        ganancia = playout(juego, estado, jugador, politica)
+
+    # Propagación: cada nodo suma para quien hizo la jugada que lleva a él
+    for k in reversed(camino):
+        visitas[k] += 1
+        valor[k] -= jugador * ganancia
+        jugador = -jugador
+
+
+def busca(juego, arbol, tiempo=None, iteraciones=None, **opciones):
+    """
+    Itera sobre el árbol hasta que pasa el tiempo (en segundos) o se
+    hacen las iteraciones, lo que ocurra primero. Las demás opciones se
+    pasan a `itera`
+
+    Regresa
+    -------
+    int: Número de iteraciones hechas
+
+    """
+    if tiempo == None and iteraciones == None:
+        raise ValueError("Se necesita tiempo o iteraciones")
+    limite = None if tiempo == None else time() + tiempo
+    n = 0
+    while iteraciones == None or n < iteraciones:
+        if limite != None and n % 16 == 0 and time() >= limite:
+            break
+        itera(juego, arbol, **opciones)
+        n += 1
+    return n
+
+
+def estadisticas_raiz(arbol):
+    """
+    Devuelve una lista de (jugada, visitas, valor total) por cada hijo de
+    la raíz
+
+    """
+    return [(arbol.jugadas[h], arbol.visitas[h], arbol.valor[h])
+            for h in arbol.hijos(0)]
+
+
+def _busca_trabajador(juego, estado, jugador, tiempo, semilla, opciones):
+    seed(semilla)
+    arbol = Arbol(estado, jugador)
+    n = busca(juego, arbol, tiempo, **opciones)
+    return n, estadisticas_raiz(arbol)
+
+
+class MotorMCTS:
+    """
+    Jugador de MCTS que conserva el árbol de un turno a otro
+
+    Se usa como cualquier otro jugador de `juega_dos_jugadores`. Antes
+    de empezar otro juego hay que llamar a `reinicia`, y si se usan
+    procesos hay que cerrarlo con `cierra` (o usarlo con `with`).
+
+    Parametros
+    ----------
+    tiempo (float): Tiempo en segundos por jugada
+    iteraciones (int): Si no es None, máximo de iteraciones por jugada
+    c (float): Peso de la exploración en UCT
+    politica (function): Política de playout. Si None y ordena no es
+        None, PoliticaOrdenada(ordena); si ambas son None, aleatoria
+    ordena (function): Orden en que se prueban los hijos nuevos
+    procesos (int): Si no es None, número de procesos que buscan
+        árboles propios (sin conservarlos) mientras se busca en el
+        árbol principal
+    max_nodos (int): Máximo de nodos del árbol
+    informe (function): Si no es None, se llama después de cada
+        búsqueda con un diccionario con la 'jugada', su 'valor'
+        promedio, sus 'visitas', las 'iteraciones' hechas, los 'nodos'
+        del árbol, los 'reusados' del turno anterior y el 'tiempo'
+
+    """
+    def __init__(
+        self, tiempo=10, iteraciones=None, c=1.0, politica=None,
+        ordena=None, procesos=None, max_nodos=10**6, informe=None
+        ):
+        if politica == None:
+            politica = aleatoria if ordena == None else PoliticaOrdenada(ordena)
+        self.tiempo = tiempo
+        self.iteraciones = iteraciones
+        self.opciones = {
+            'c': c, 'politica': politica, 'ordena': ordena,
+            'max_nodos': max_nodos
+        }
+        self.procesos = procesos
+        self.informe = informe
+        self.ejecutor = None
+        if procesos != None:
+            self.ejecutor = ProcessPoolExecutor(procesos)
+        self.reinicia()
+
+    def reinicia(self):
+        """
+        Olvida el árbol, para empezar un juego nuevo
+
+        """
+        self.arbol = None
+
+    def cierra(self):
+        if self.ejecutor != None:
+            self.ejecutor.shutdown(cancel_futures=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.cierra()
+
+    def reusa(self, juego, estado, jugador):
+        """
+        Deja en self.arbol el subárbol del estado si está a una o dos
+        jugadas de la raíz del árbol anterior, o un árbol nuevo
+
+        """
+        arbol = self.arbol
+        if arbol != None:
+            if arbol.estado == estado and arbol.jugador == jugador:
+                return
+            for h in arbol.hijos(0):
+                s = juego.transicion(arbol.estado, arbol.jugadas[h],
+                                     arbol.jugador)
+                if s == estado and -arbol.jugador == jugador:
+                    self.arbol = arbol.subarbol(h, estado, jugador)
+                    return
+                for n in arbol.hijos(h):
+                    s2 = juego.transicion(s, arbol.jugadas[n],
+                                          -arbol.jugador)
+                    if s2 == estado and arbol.jugador == jugador:
+                        self.arbol = arbol.subarbol(n, estado, jugador)
+                        return
+        self.arbol = Arbol(estado, jugador)
+
+    def busca(self, juego, estado, jugador):
+        """
+        Devuelve (jugada, valor promedio para el jugador)
+
+        """
+        t0 = time()
+        self.reusa(juego, estado, jugador)
+        reusados = len(self.arbol)
+        futuros = []
+        if self.ejecutor != None:
+            futuros = [
+                self.ejecutor.submit(
+                    _busca_trabajador, juego, estado, jugador,
+                    self.tiempo, random(), self.opciones
+                )
+                for _ in range(self.procesos)
+            ]
+        n = busca(
+            juego, self.arbol, self.tiempo, self.iteraciones,
+            **self.opciones
+        )
+        totales = {}
+        for a, visitas, valor in estadisticas_raiz(self.arbol):
+            totales[a] = [visitas, valor]
+        for futuro in futuros:
+            n_trabajador, raiz = futuro.result()
+            n += n_trabajador
+            for a, visitas, valor in raiz:
+                total = totales.setdefault(a, [0, 0.0])
+                total[0] += visitas
+                total[1] += valor
+        if not totales:
+            # No alcanzó ni una iteración: se expande la raíz
+            itera(juego, self.arbol, **self.opciones)
+            totales = {a: [v, s] for a, v, s in estadisticas_raiz(self.arbol)}
+        jugada = max(totales, key=lambda a: totales[a][0])
+        visitas, valor = totales[jugada]
+        valor = valor / visitas if visitas else 0.0
+        if self.informe != None:
+            self.informe({
+                'jugada': jugada, 'valor': valor, 'visitas': visitas,
+                'iteraciones': n, 'nodos': len(self.arbol),
+                'reusados': reusados, 'tiempo': time() - t0
+            })
+        return jugada, valor
+
+    def __call__(self, juego, estado, jugador):
+        jugada, _ = self.busca(juego, estado, jugador)
+        return jugada
+
+
+def jugador_mcts(
+    juego, estado, jugador, tiempo=10, iteraciones=None, c=1.0,
+    politica=None, ordena=None, procesos=None
+    ):
+    """
+    Devuelve la mejor jugada para el jugador en el estado buscando con
+    MCTS durante tiempo segundos, como minimax_iterativo. No conserva
+    el árbol; para eso está MotorMCTS
+
+    """
+    with MotorMCTS(tiempo, iteraciones, c, politica, ordena, procesos) as motor:
+        return motor(juego, estado, jugador)
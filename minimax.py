@@ -7,18 +7,292 @@ Modulo con el minimax con algunos los poderes
     4- Busqueda iterativa
     5- Tablas de transposicion
     6- Trazabilidad
+    7- Búsqueda de variante principal (PVS) y ventanas de aspiración
+    8- Solución exacta con ventanas nulas (MTD(f))
 """
 from random import shuffle
 from time import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import TimeoutError as EsperaAgotada
+from multiprocessing import Value
+from threading import Thread
+from juegos_simplificado import implementa
+
+# Tipos de valores guardados en la tabla de transposición
+EXACTO, COTA_INF, COTA_SUP = 0, 1, 2
+
+# Profundidad con la que se guarda una búsqueda hasta el final (d=None)
+PROF_MAX = 1000
+
+# Ancho de la ventana nula de PVS (los valores no son enteros)
+VENTANA_NULA = 1e-6
+
+
+class TiempoAgotado(Exception):
+    """
+    Se lanza dentro de negamax cuando se acaba el tiempo de la búsqueda
+
+    """
+
+
+class Reloj:
+    """
+    Límite de tiempo para una búsqueda
+
+    negamax llama a `revisa` en cada nodo, y cada `cada` nodos se 
+    compara la hora con el límite. En `parcial` se guarda el mejor 
+    resultado de la raíz entre las jugadas que ya se terminaron de 
+    buscar y que superaron a la alpha de la raíz (los demás valores 
+    sólo son cotas), para usarlo si la búsqueda no alcanza a terminar.
+    Otro hilo puede terminar la búsqueda antes del límite con `cancela`.
+
+    Parametros
+    ----------
+    limite (float): Hora límite, como la da time.time()
+    cada (int): Cada cuántos nodos se revisa la hora
+    detener (function): Si no es None, función sin parámetros que se
+        llama al revisar la hora, y si regresa True se termina la 
+        búsqueda (la usan los procesos de negamax_paralelo)
+
+    """
+    def __init__(self, limite, cada=256, detener=None):
+        self.limite = limite
+        self.cada = cada
+        self.detener = detener
+        self.nodos = 0
+        self.parcial = None
+        self.cancelado = False
+
+    def cancela(self):
+        self.cancelado = True
+
+    def revisa(self):
+        self.nodos += 1
+        if self.nodos % self.cada == 0 and (
+            self.cancelado or time() >= self.limite or 
+            (self.detener != None and self.detener())):
+            raise TiempoAgotado()
+
+
+class Estadisticas:
+    """
+    Contadores de lo que pasa durante una búsqueda
+
+    Se le pasa a negamax, que cuenta los nodos visitados, las hojas 
+    evaluadas, los estados terminales, las consultas a la tabla de 
+    transposición (cuántas encontraron el estado y cuántas permitieron 
+    regresar sin buscar) y los cortes beta, separando los que ocurrieron
+    con la primera jugada, que miden qué tan bueno es el ordenamiento.
+    Con PVS cuenta también las búsquedas con ventana nula que se 
+    tuvieron que repetir con la ventana completa.
+
+    negamax_iterativo además guarda en `iteraciones` un diccionario por
+    iteración con la profundidad 'd', los 'nodos', el 'tiempo', el 
+    factor de ramificación efectivo 'ebf' (nodos de la iteración entre 
+    nodos de la anterior) y los contadores de esa iteración.
+
+    """
+    CONTADORES = (
+        'nodos', 'hojas', 'terminales', 'tt_consultas', 'tt_aciertos',
+        'tt_cortes', 'cortes_beta', 'cortes_primera', 'reintentos'
+    )
+
+    def __init__(self):
+        self.reinicia()
+
+    def reinicia(self):
+        for nombre in self.CONTADORES:
+            setattr(self, nombre, 0)
+        self.iteraciones = []
+
+    def suma(self, otra):
+        """
+        Agrega los contadores de otra búsqueda
+
+        """
+        for nombre in self.CONTADORES:
+            total = getattr(self, nombre) + getattr(otra, nombre)
+            setattr(self, nombre, total)
+
+    def tasa_primera(self):
+        """
+        Fracción de los cortes beta que ocurrieron con la primera jugada
+
+        """
+        if self.cortes_beta == 0:
+            return 0
+        return self.cortes_primera / self.cortes_beta
+
+    def como_dict(self):
+        datos = {nombre: getattr(self, nombre) for nombre in self.CONTADORES}
+        datos['tasa_primera'] = self.tasa_primera()
+        return datos
+
+
+class Heuristicas:
+    """
+    Ordenamiento dinámico de jugadas durante la búsqueda
+
+    Guarda, por nivel, las últimas jugadas que provocaron un corte beta
+    (jugadas asesinas), y una tabla de historia que suma d*d a la jugada 
+    del jugador cada vez que provoca un corte a profundidad d. En cada 
+    nodo las jugadas se ordenan primero con la función de ordenamiento,
+    luego por su historia (conservando el orden anterior entre jugadas 
+    con igual historia) y al final se adelantan las jugadas asesinas
+    del nivel.
+
+    Parametros
+    ----------
+    asesinas (int): Jugadas asesinas que se guardan por nivel
+
+    """
+    def __init__(self, asesinas=2):
+        self.num_asesinas = asesinas
+        self.limpia()
+
+    def limpia(self):
+        self.asesinas = []
+        self.historia = {}
+
+    def envejece(self):
+        """
+        Reduce a la mitad la historia y olvida las jugadas asesinas, 
+        pues los niveles cambian de un turno a otro
+
+        """
+        self.asesinas = []
+        self.historia = {
+            llave: valor // 2 for llave, valor in self.historia.items() 
+            if valor > 1
+        }
+
+    def ordena(self, jugadas, jugador, nivel):
+        if self.historia:
+            historia = self.historia
+            jugadas.sort(key=lambda a: -historia.get((jugador, a), 0))
+        if nivel < len(self.asesinas):
+            for a in reversed(self.asesinas[nivel]):
+                if a in jugadas:
+                    jugadas.remove(a)
+                    jugadas.insert(0, a)
+        return jugadas
+
+    def corte(self, a, jugador, nivel, d):
+        """
+        Registra que la jugada a del jugador provocó un corte beta en el
+        nivel, a profundidad d
+
+        """
+        llave = (jugador, a)
+        self.historia[llave] = (
+            self.historia.get(llave, 0) + (1 if d == None else d * d)
+        )
+        while len(self.asesinas) <= nivel:
+            self.asesinas.append([])
+        asesinas = self.asesinas[nivel]
+        if a in asesinas:
+            asesinas.remove(a)
+        asesinas.insert(0, a)
+        del asesinas[self.num_asesinas:]
+
+
+class TablaTransposicion:
+    """
+    Tabla de transposición de tamaño fijo
+
+    Cada entrada es una tupla (clave, valor, profundidad, tipo, jugada,
+    edad), donde tipo indica si el valor es exacto, una cota inferior 
+    (hubo corte beta) o una cota superior (ninguna jugada superó a 
+    alpha), y jugada es la mejor jugada encontrada, que se usa para 
+    ordenar.
+
+    La tabla tiene un número fijo de cubetas con dos entradas cada una:
+    la primera sólo se reemplaza por búsquedas de igual o mayor
+    profundidad, o si es de una búsqueda anterior (ver `envejece`), y 
+    la segunda se reemplaza siempre.
+
+    Parametros
+    ----------
+    entradas (int): Número máximo de entradas en la tabla
+    mb (float): Si no es None, tamaño aproximado de la tabla en MB,
+        y se ignora entradas
+
+    """
+    # Aproximado, para claves enteras; con estados como clave es más
+    BYTES_POR_ENTRADA = 150
+
+    def __init__(self, entradas=2**16, mb=None):
+        if mb != None:
+            entradas = int(mb * 2**20 / self.BYTES_POR_ENTRADA)
+        self.cubetas = max(1, entradas // 2)
+        self.limpia()
+
+    def limpia(self):
+        """
+        Borra todas las entradas de la tabla
+
+        """
+        self.profundas = self.cubetas * [None]
+        self.recientes = self.cubetas * [None]
+        self.edad = 0
+
+    def envejece(self):
+        """
+        Marca como viejas todas las entradas actuales, para que las de
+        la siguiente búsqueda las puedan reemplazar aunque sean menos
+        profundas. Las entradas viejas se siguen pudiendo consultar.
+
+        """
+        self.edad += 1
+
+    def busca(self, clave):
+        """
+        Devuelve la entrada guardada para la clave, o None si no está
+
+        """
+        i = hash(clave) % self.cubetas
+        entrada = self.profundas[i]
+        if entrada != None and entrada[0] == clave:
+            return entrada
+        entrada = self.recientes[i]
+        if entrada != None and entrada[0] == clave:
+            return entrada
+        return None
+
+    def guarda(self, clave, valor, profundidad, tipo, jugada):
+        """
+        Guarda el resultado de la búsqueda en la clave
+
+        """
+        i = hash(clave) % self.cubetas
+        entrada = (clave, valor, profundidad, tipo, jugada, self.edad)
+        anterior = self.profundas[i]
+        if (anterior == None or anterior[0] == clave or
+            profundidad >= anterior[2] or anterior[5] != self.edad):
+            self.profundas[i] = entrada
+        else:
+            self.recientes[i] = entrada
+
+    def __len__(self):
+        return sum(
+            1 for entradas in (self.profundas, self.recientes) 
+            for entrada in entradas if entrada != None
+        )
+
 
 def negamax(
     juego, estado, jugador,
     alpha=-1e10, beta=1e10, ordena=None, 
     d=None, evalua=None,
-    transp={}, traza=[]
+    transp=None, traza=[], clave=None, en_sitio=None,
+    reloj=None, nivel=0, estadisticas=None, heuristicas=None,
+    pvs=False, evalua_lotes=None, prof_lotes=1
     ):
     """
     Devuelve la mejor jugada para el jugador en el estado
+
+    Los parámetros se revisan una sola vez; los nodos se buscan con 
+    _negamax, que los toma de un _Contexto compartido.
     
     Parametros
     ----------
@@ -33,91 +307,994 @@ def negamax(
         Si None, busca hasta el final
     evalua: function de evaluación
         Siempre evalua para el jugador 1
-    transp (dict): Tabla de transposición
+    transp (TablaTransposicion): Tabla de transposición
+        si None, se usa una tabla nueva
     traza (list): Trazabilidad
+    clave (int): Clave del estado, si el juego tiene claves.
+        Si None, se calcula con juego.clave
+    en_sitio (Tablero): Si no es None, tablero mutable (ver
+        juego.mutable) sobre el que se hacen y deshacen las jugadas,
+        y estado es su lista de casillas
+    reloj (Reloj): Si no es None, se lanza TiempoAgotado al llegar
+        al límite de tiempo
+    nivel (int): Distancia a la raíz de la búsqueda
+    estadisticas (Estadisticas): Si no es None, se cuenta lo que pasa
+        en la búsqueda
+    heuristicas (Heuristicas): Si no es None, se ordenan las jugadas 
+        también con jugadas asesinas e historia, después de ordena
+    pvs (bool): Si True, sólo la primera jugada se busca con la 
+        ventana (alpha, beta); las demás se buscan con una ventana nula
+        para probar que no superan a alpha, y se vuelven a buscar con 
+        la ventana completa si la superan
+    evalua_lotes (function): Si no es None, función que recibe una 
+        lista de estados y regresa la lista de sus evaluaciones para el
+        jugador 1. Los nodos a profundidad restante prof_lotes o menos
+        se buscan sin poda (ver busca_lotes), evaluando todas sus hojas
+        con una sola llamada
+    prof_lotes (int): Profundidad de los subárboles que se evalúan
+        por lotes
     
     Regresa
     -------
     tuple: (lista mejores jugadas, valor)
     
     """
-    if d != None and evalua == None:
+    if d != None and evalua == None and evalua_lotes == None:
         raise ValueError("Se necesita evalua si d no es None")
+    if evalua_lotes != None and prof_lotes < 1:
+        raise ValueError("prof_lotes debe ser al menos 1")
     if type(ordena) != type(None) and type(ordena) != type(lambda x: x):
         raise ValueError("ordena debe ser una función")
     if type(evalua) != type(None) and type(evalua) != type(lambda x: x):
         raise ValueError("evalua debe ser una función")
-    if type(transp) != dict:
-        raise ValueError("transp debe ser un diccionario")
+    if transp == None:
+        transp = TablaTransposicion()
+    if not isinstance(transp, TablaTransposicion):
+        raise ValueError("transp debe ser una TablaTransposicion")
     if type(traza) != list: 
         raise ValueError("traza debe ser una lista")
 
-    if juego.terminal(estado):
-        return [], jugador * juego.ganancia(estado)
+    c = _Contexto()
+    c.juego, c.ordena, c.evalua, c.transp = juego, ordena, evalua, transp
+    c.traza, c.i_traza, c.en_sitio, c.reloj = traza, 0, en_sitio, reloj
+    c.estadisticas, c.heuristicas, c.pvs = estadisticas, heuristicas, pvs
+    c.evalua_lotes, c.prof_lotes = evalua_lotes, prof_lotes
+    c.tiene_clave = implementa(juego, 'clave')
+    c.simetrico = implementa(juego, 'canonica')
+    c.pv = [[] for _ in range(nivel + 2)]
+    v = _negamax(c, estado, jugador, alpha, beta, d, clave, nivel)
+    return list(c.pv[nivel]), v
+
+
+class _Contexto:
+    """
+    Lo que comparten todos los nodos de una búsqueda de negamax
+
+    negamax revisa los parámetros una sola vez y los guarda aquí, en 
+    lugar de pasarlos y revisarlos en cada nodo. En pv[nivel] queda la 
+    variante principal del último nodo que se buscó en ese nivel; las 
+    listas se reutilizan de un nodo a otro. i_traza es la siguiente 
+    jugada de traza por probar primero.
+
+    """
+    __slots__ = (
+        'juego', 'ordena', 'evalua', 'transp', 'traza', 'i_traza', 
+        'en_sitio', 'reloj', 'estadisticas', 'heuristicas', 'pvs', 
+        'evalua_lotes', 'prof_lotes', 'tiene_clave', 'simetrico', 'pv'
+    )
+
+
+def _negamax(c, estado, jugador, alpha, beta, d, clave, nivel):
+    """
+    El negamax de un nodo, con los parámetros que no cambian en el 
+    contexto c. Regresa el valor y deja la variante en c.pv[nivel]
+
+    """
+    juego, en_sitio, estadisticas = c.juego, c.en_sitio, c.estadisticas
+    if c.reloj != None:
+        c.reloj.revisa()
+    if estadisticas != None:
+        estadisticas.nodos += 1
     if d == 0:
-        return [], jugador * evalua(estado)
-    if d != None and estado in transp and transp[estado][1] >= d:
-        return [], transp[estado][0]
+        c.pv[nivel].clear()
+        # En las hojas no hacen falta las jugadas
+        if juego.terminal(estado):
+            if estadisticas != None:
+                estadisticas.terminales += 1
+            return jugador * juego.ganancia(estado)
+        if estadisticas != None:
+            estadisticas.hojas += 1
+        if c.evalua == None:
+            hoja = estado if en_sitio == None else juego.inmutable(en_sitio)
+            return jugador * c.evalua_lotes([hoja])[0]
+        return jugador * c.evalua(estado)
+    if en_sitio != None:
+        clave = en_sitio.clave
+    elif clave == None and c.tiene_clave:
+        clave = juego.clave(estado, jugador)
+    llave = estado if clave == None else clave
+    simetria = None
+    if clave != None and c.simetrico:
+        # Los estados simétricos comparten entrada, con la jugada 
+        # guardada para el estado canónico
+        llave, simetria = juego.canonica(clave)
+    prof = PROF_MAX if d == None else d
+    transp = c.transp
+    entrada = transp.busca(llave)
+    if estadisticas != None:
+        estadisticas.tt_consultas += 1
+        estadisticas.tt_aciertos += entrada != None
+    if entrada != None:
+        a_tt = (entrada[4] if simetria == None else 
+                juego.destransforma(entrada[4], simetria))
+    fila = c.pv[nivel]
+    if entrada != None and entrada[2] >= prof:
+        _, v, _, tipo, _, _ = entrada
+        if (tipo == EXACTO or 
+            (tipo == COTA_INF and v >= beta) or
+            (tipo == COTA_SUP and v <= alpha)):
+            if estadisticas != None:
+                estadisticas.tt_cortes += 1
+            fila.clear()
+            fila.append(a_tt)
+            return v
+    # Las jugadas se generan sólo si el nodo se va a expandir
+    final, ganancia, jugadas = juego.expande(estado, jugador)
+    if final:
+        if estadisticas != None:
+            estadisticas.terminales += 1
+        fila.clear()
+        return jugador * ganancia
+    if c.evalua_lotes != None and d != None and d <= c.prof_lotes:
+        traza_lotes, v = busca_lotes(
+            juego, estado, jugador, jugadas, d, c.evalua_lotes, en_sitio, 
+            estadisticas
+        )
+        mejor = traza_lotes[0]
+        if simetria != None:
+            mejor = juego.transforma(mejor, simetria)
+        transp.guarda(llave, v, prof, EXACTO, mejor)
+        fila[:] = traza_lotes
+        return v
     
+    alpha_0 = alpha
     v = -1e10
-    jugadas = list(juego.jugadas_legales(estado, jugador))
-    if ordena != None:
-        jugadas = ordena(jugadas, jugador)
+    if c.ordena != None:
+        jugadas = c.ordena(jugadas, jugador)
     else:
         shuffle(jugadas)
-    if traza:
-        a_pref = traza.pop(0)
+    if c.heuristicas != None:
+        jugadas = c.heuristicas.ordena(list(jugadas), jugador, nivel)
+    if entrada != None and a_tt in jugadas:
+        jugadas.remove(a_tt)
+        jugadas.insert(0, a_tt)
+    if c.i_traza < len(c.traza):
+        a_pref = c.traza[c.i_traza]
+        c.i_traza += 1
         if a_pref in jugadas:
             jugadas = [a_pref] + [a for a in jugadas if a != a_pref]
-    for a in jugadas:
-        traza_actual, v2 = negamax(
-            juego, juego.transicion(estado, a, jugador), -jugador, 
-            -beta, -alpha, ordena, d if d == None else d - 1, 
-            evalua, transp, traza
-        )
+    if len(c.pv) == nivel + 1:
+        c.pv.append([])
+    fila_hijo = c.pv[nivel + 1]
+    d_hijo = d if d == None else d - 1
+    for i, a in enumerate(jugadas):
+        if en_sitio != None:
+            juego.hace(en_sitio, a, jugador)
+            hijo, clave_hijo = estado, None
+        elif clave == None:
+            hijo, clave_hijo = juego.transicion(estado, a, jugador), None
+        else:
+            hijo, clave_hijo = juego.transicion_clave(
+                estado, clave, a, jugador
+            )
+        completa = True
+        if c.pvs and i > 0:
+            v2 = _negamax(
+                c, hijo, -jugador, -alpha - VENTANA_NULA, -alpha, d_hijo,
+                clave_hijo, nivel + 1
+            )
+            completa = alpha < -v2 < beta
+            if completa and estadisticas != None:
+                estadisticas.reintentos += 1
+        if completa:
+            v2 = _negamax(
+                c, hijo, -jugador, -beta, -alpha, d_hijo, clave_hijo, 
+                nivel + 1
+            )
+        if en_sitio != None:
+            juego.deshace(en_sitio)
         v2 = -v2
         if v2 > v:
             v = v2
             mejor = a
-            mejores = traza_actual[:]
+            fila.clear()
+            fila.append(a)
+            fila += fila_hijo
+            # Si no supera a la alpha de la ventana, v sólo es una cota
+            # superior y no sirve para elegir jugada
+            if nivel == 0 and c.reloj != None and v > alpha_0:
+                c.reloj.parcial = list(fila), v
         if v >= beta:
+            if estadisticas != None:
+                estadisticas.cortes_beta += 1
+                estadisticas.cortes_primera += i == 0
+            if c.heuristicas != None:
+                c.heuristicas.corte(a, jugador, nivel, d)
             break
         if v > alpha:
             alpha = v
-    transp[estado] = (v, d)
-    return [mejor] + mejores, v 
+    tipo = (COTA_SUP if v <= alpha_0 else 
+            COTA_INF if v >= beta else EXACTO)
+    transp.guarda(
+        llave, v, prof, tipo, 
+        mejor if simetria == None else juego.transforma(mejor, simetria)
+    )
+    return v
+
+
+def busca_lotes(
+    juego, estado, jugador, jugadas, d, evalua_lotes, en_sitio=None,
+    estadisticas=None
+    ):
+    """
+    Busca sin poda el subárbol de profundidad d, juntando sus hojas 
+    para evaluarlas todas con una sola llamada a evalua_lotes
+
+    Sin poda se evalúan más hojas que con alpha-beta, pero con una 
+    evaluación vectorizada cada hoja cuesta mucho menos que una llamada
+    a evalua. El valor es exacto, así que no depende de alpha y beta.
+
+    Parametros
+    ----------
+    jugadas (list): Jugadas legales en el estado (no terminal)
+    d (int): Profundidad del subárbol
+    evalua_lotes (function): Lista de estados -> lista de evaluaciones
+        para el jugador 1. Si en_sitio no es None, los estados son 
+        copias del tablero hechas con juego.inmutable
+    en_sitio (Tablero): Como en negamax
+
+    Regresa
+    -------
+    tuple: (lista mejores jugadas, valor)
+
+    """
+    hojas = []
+
+    def expande(estado, jugador, jugadas, d):
+        # Cada rama es un índice en hojas, una tupla con la ganancia de
+        # un estado terminal, o una lista de (jugada, rama)
+        ramas = []
+        for a in jugadas:
+            if en_sitio != None:
+                juego.hace(en_sitio, a, jugador)
+                hijo = estado
+            else:
+                hijo = juego.transicion(estado, a, jugador)
+            if estadisticas != None:
+                estadisticas.nodos += 1
+            final, ganancia, jugadas_hijo = juego.expande(hijo, -jugador)
+            if final:
+                if estadisticas != None:
+                    estadisticas.terminales += 1
+                rama = (ganancia,)
+            elif d == 1:
+                hojas.append(
+                    juego.inmutable(en_sitio) if en_sitio != None else hijo
+                )
+                rama = len(hojas) - 1
+            else:
+                rama = expande(hijo, -jugador, jugadas_hijo, d - 1)
+            if en_sitio != None:
+                juego.deshace(en_sitio)
+            ramas.append((a, rama))
+        return ramas
+
+    def valor(ramas, jugador):
+        mejor, mejores, v = None, [], -1e10
+        for a, rama in ramas:
+            if type(rama) == tuple:
+                traza, v2 = [], jugador * rama[0]
+            elif type(rama) == int:
+                traza, v2 = [], jugador * valores[rama]
+            else:
+                traza, v2 = valor(rama, -jugador)
+                v2 = -v2
+            if v2 > v:
+                mejor, mejores, v = a, traza, v2
+        return [mejor] + mejores, v
+
+    ramas = expande(estado, jugador, jugadas, d)
+    valores = list(evalua_lotes(hojas)) if hojas else []
+    if estadisticas != None:
+        estadisticas.hojas += len(hojas)
+    return valor(ramas, jugador)
+
+
+def negamax_en_sitio(juego, estado, jugador, **opciones):
+    """
+    Igual que negamax, pero si el juego tiene estado mutable (ver 
+    ModeloJuegoZT2.mutable) hace y deshace las jugadas sobre un solo 
+    Tablero en lugar de crear un estado nuevo en cada nodo
+    
+    """
+    if not implementa(juego, 'mutable'):
+        return negamax(juego, estado, jugador, **opciones)
+    tablero = juego.mutable(estado, jugador)
+    return negamax(
+        juego, tablero.casillas, jugador, en_sitio=tablero, **opciones
+    )
+
+
+# Estado de cada proceso trabajador de la búsqueda en paralelo
+_alpha_compartido = None
+_busqueda_compartida = None
+_transp_trabajador = None
+
+def _inicia_trabajador(alpha, busqueda):
+    global _alpha_compartido, _busqueda_compartida, _transp_trabajador
+    _alpha_compartido = alpha
+    _busqueda_compartida = busqueda
+    _transp_trabajador = TablaTransposicion(2**18)
+
+
+def _busca_hijo(
+    juego, estado, jugador, a, alpha, beta, 
+    ordena, d, evalua, traza, limite, pvs, busqueda
+    ):
+    """
+    Busca, en un proceso trabajador, el hijo de la raíz que resulta de 
+    la jugada a. Se empieza con la mejor alpha que ya encontraron los 
+    otros procesos, y si se mejora se comparte. La alpha compartida 
+    sólo se lee al empezar: la ventana no cambia durante la búsqueda.
+
+    La búsqueda se termina con TiempoAgotado al llegar al límite, o si
+    el número de búsqueda compartido deja de ser `busqueda` porque la 
+    búsqueda de la raíz ya terminó o se canceló.
+
+    Regresa (traza, valor, alpha con la que se buscó)
+    
+    """
+    if _busqueda_compartida.value != busqueda:
+        raise TiempoAgotado()
+    with _alpha_compartido.get_lock():
+        alpha = max(alpha, _alpha_compartido.value)
+    reloj = Reloj(
+        float('inf') if limite == None else limite, 
+        detener=lambda: _busqueda_compartida.value != busqueda
+    )
+    traza, v = negamax_en_sitio(
+        juego, juego.transicion(estado, a, jugador), -jugador, 
+        alpha=-beta, beta=-alpha, ordena=ordena, 
+        d=d if d == None else d - 1, evalua=evalua, 
+        transp=_transp_trabajador, traza=traza, reloj=reloj, nivel=1,
+        pvs=pvs
+    )
+    v = -v
+    with _alpha_compartido.get_lock():
+        if v > _alpha_compartido.value:
+            _alpha_compartido.value = v
+    return [a] + traza, v, alpha
+
+
+class Paralelo:
+    """
+    Procesos para buscar en paralelo las jugadas de la raíz
+
+    Cada proceso conserva su propia tabla de transposición de una 
+    búsqueda a otra, y todos comparten la mejor alpha encontrada, que
+    cada proceso lee al empezar a buscar una jugada (no durante la 
+    búsqueda). También comparten el número de la búsqueda actual: al 
+    terminar o cancelarse una búsqueda cambia, y los procesos que 
+    todavía buscan para ella se detienen en cuanto revisan su reloj.
+    Hay que cerrarlo con `cierra` o usarlo con `with`.
+
+    Parametros
+    ----------
+    procesos (int): Número de procesos. Si None, uno por núcleo
+
+    """
+    def __init__(self, procesos=None):
+        self.alpha = Value('d', -1e10)
+        self.busqueda = Value('i', 0)
+        self.ejecutor = ProcessPoolExecutor(
+            procesos, initializer=_inicia_trabajador, 
+            initargs=(self.alpha, self.busqueda)
+        )
+
+    def cierra(self):
+        self.ejecutor.shutdown(cancel_futures=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.cierra()
+
+
+def negamax_paralelo(
+    juego, estado, jugador,
+    alpha=-1e10, beta=1e10, ordena=None, 
+    d=None, evalua=None, traza=[], reloj=None, 
+    paralelo=None, procesos=None, pvs=False
+    ):
+    """
+    Igual que negamax, pero las jugadas de la raíz se buscan en 
+    paralelo en varios procesos
+
+    La primera jugada (la de la traza, si la hay) se busca sola para 
+    tener una buena alpha, y las demás se reparten entre los procesos 
+    ("young brothers wait"). juego, ordena y evalua se mandan a los 
+    procesos, así que no pueden ser funciones lambda.
+
+    Parametros
+    ----------
+    Los mismos que negamax, y además
+    paralelo (Paralelo): Procesos a usar. Si None, se crean 
+        `procesos` procesos sólo para esta búsqueda
+
+    Con reloj, la búsqueda se detiene (en la raíz y en los procesos) al
+    llegar al límite o si otro hilo llama a reloj.cancela.
+
+    Regresa
+    -------
+    tuple: (lista mejores jugadas, valor)
+    
+    """
+    if paralelo == None:
+        with Paralelo(procesos) as paralelo:
+            return negamax_paralelo(
+                juego, estado, jugador, alpha, beta, ordena, 
+                d, evalua, traza, reloj, paralelo, pvs=pvs
+            )
+
+    final, ganancia, jugadas = juego.expande(estado, jugador)
+    if final:
+        return [], jugador * ganancia
+    if d == 0:
+        return [], jugador * evalua(estado)
+
+    if ordena != None:
+        jugadas = ordena(jugadas, jugador)
+    else:
+        shuffle(jugadas)
+    traza = list(traza)
+    if traza:
+        a_pref = traza.pop(0)
+        if a_pref in jugadas:
+            jugadas = [a_pref] + [a for a in jugadas if a != a_pref]
+
+    paralelo.alpha.value = alpha
+    busqueda = paralelo.busqueda.value
+    limite = None if reloj == None else reloj.limite
+    def busca(a, traza):
+        return paralelo.ejecutor.submit(
+            _busca_hijo, juego, estado, jugador, a, alpha, beta, 
+            ordena, d, evalua, traza, limite, pvs, busqueda
+        )
+
+    def espera(futuro):
+        if reloj == None:
+            return futuro.result()
+        while True:
+            if reloj.cancelado:
+                raise TiempoAgotado()
+            try:
+                return futuro.result(timeout=0.05)
+            except EsperaAgotada:
+                pass
+
+    mejor = None
+    futuros = [busca(jugadas[0], traza)]
+    try:
+        # Se revisan los resultados en orden, así que el primero
+        # termina antes de mandar los demás
+        for i, futuro in enumerate(futuros):
+            traza_a, v, alpha_a = espera(futuro)
+            if i == 0:
+                futuros += [busca(a, []) for a in jugadas[1:]]
+            # Si no superó a la alpha con la que se buscó, v sólo es 
+            # una cota superior y no puede ser la mejor
+            if (mejor == None or v > mejor[1]) and (i == 0 or v > alpha_a):
+                mejor = traza_a, v
+                if reloj != None and v > alpha:
+                    reloj.parcial = mejor
+            if v >= beta:
+                break
+    finally:
+        # Los procesos que siguen buscando para esta búsqueda se detienen
+        with paralelo.busqueda.get_lock():
+            paralelo.busqueda.value += 1
+        for futuro in futuros:
+            futuro.cancel()
+    return mejor
 
 
 def jugador_negamax(
-    juego, estado, jugador, ordena=None, d=None, evalua=None
+    juego, estado, jugador, ordena=None, d=None, evalua=None,
+    procesos=None
     ):
     """
     Funcion burrito para el negamax
+
+    Si procesos no es None, se busca en paralelo con negamax_paralelo
     
     """
-    traza, _ = negamax(
+    if procesos != None:
+        traza, _ = negamax_paralelo(
+            juego=juego, estado=estado, jugador=jugador, 
+            ordena=ordena, d=d, evalua=evalua, procesos=procesos)
+        return traza[0]
+    traza, _ = negamax_en_sitio(
         juego=juego, estado=estado, jugador=jugador, 
         alpha=-1e10, beta=1e10, ordena=ordena, d=d, 
-        evalua=evalua, transp={}, traza=[])
+        evalua=evalua, transp=TablaTransposicion(), traza=[],
+        heuristicas=Heuristicas())
     return traza[0]
 
 
-def minimax_iterativo(
+def negamax_iterativo(
     juego, estado, jugador, tiempo=10,
     ordena=None, d=None, evalua=None,
+    transp=None, traza=None, informe=None, procesos=None,
+    estadisticas=None, heuristicas=None, pvs=False, aspiracion=None,
+    ampliacion=4, evalua_lotes=None, reloj=None
+    ):
+    """
+    Busqueda con profundidad iterativa acotada a un periodo de tiempo
+
+    Todas las iteraciones usan la misma tabla de transposición, y cada 
+    una empieza por la variante principal de la anterior. Si una 
+    iteración llega al límite de tiempo se interrumpe, y se usa el 
+    resultado de la última iteración completa, o el de la interrumpida 
+    si en la raíz ya se había terminado de buscar al menos una jugada 
+    con valor dentro de la ventana de aspiración o arriba de ella (la 
+    primera es la mejor de la iteración anterior).
+
+    Parametros
+    ----------
+    tiempo (float): Tiempo límite en segundos. No se empiezan 
+        iteraciones nuevas después de tiempo/2
+    d (int): Profundidad máxima. Si None, sin límite
+    transp (TablaTransposicion): Tabla de transposición
+        si None, se usa una tabla nueva
+    traza (list): Variante principal con la que se empieza a buscar
+    informe (function): Si no es None, se llama al terminar cada 
+        iteración con un diccionario con la profundidad 'd', el 
+        'valor' y la 'traza' de la iteración (None y [] si se 
+        interrumpió antes de terminar la primera jugada de la raíz), el
+        'tiempo' transcurrido desde el inicio,
+        si la iteración quedó 'completa', cuántas 'busquedas' se 
+        hicieron (más de una si falló la ventana de aspiración) y, salvo
+        en paralelo, las 'estadisticas' de la iteración (ver 
+        Estadisticas) 
+    procesos (int): Si no es None, cada iteración se busca en 
+        paralelo con negamax_paralelo, y transp no se usa
+    estadisticas (Estadisticas): Si no es None, se acumulan los 
+        contadores de todas las iteraciones y se agrega un registro 
+        por iteración a estadisticas.iteraciones
+    heuristicas (Heuristicas): Jugadas asesinas e historia, que se 
+        conservan entre iteraciones. Si None, se usan unas nuevas
+    pvs (bool): Se pasa a negamax
+    aspiracion (float): Si no es None, cada iteración se busca con la
+        ventana (v - aspiracion, v + aspiracion), donde v es el valor 
+        de la iteración anterior. Si el valor queda fuera de la 
+        ventana, se multiplica su ancho por `ampliacion` del lado que 
+        falló y se vuelve a buscar
+    ampliacion (float): Factor con el que se amplía la ventana
+    evalua_lotes (function): Se pasa a negamax, salvo en paralelo
+    reloj (Reloj): Si no es None, se usa en lugar de uno con el límite
+        de tiempo, y no se empiezan iteraciones nuevas si se cancela
+
+    Regresa
+    -------
+    tuple: (lista mejores jugadas, valor) de la última iteración
+
+    """
+    t0 = time()
+    if transp == None:
+        transp = TablaTransposicion()
+    if heuristicas == None:
+        heuristicas = Heuristicas()
+    if reloj == None:
+        reloj = Reloj(t0 + tiempo)
+    paralelo = None if procesos == None else Paralelo(procesos)
+    prof, traza, v = 2, list(traza) if traza else [], None
+    cuenta = informe != None or estadisticas != None
+    nodos_antes = 0
+    try:
+        while (time() - t0 < tiempo/2 and (d == None or prof <= d) and 
+               not reloj.cancelado):
+            reloj.parcial = None
+            completa = True
+            t_iteracion = time()
+            iteracion = Estadisticas() if cuenta and paralelo == None else None
+            alpha, beta = -1e10, 1e10
+            if aspiracion != None and v != None:
+                abajo = arriba = aspiracion
+                alpha, beta = v - abajo, v + arriba
+            busquedas = 0
+            try:
+                while True:
+                    busquedas += 1
+                    if paralelo != None:
+                        traza_i, v_i = negamax_paralelo(
+                            juego=juego, estado=estado, jugador=jugador, 
+                            alpha=alpha, beta=beta, ordena=ordena, d=prof, 
+                            evalua=evalua, traza=traza, reloj=reloj, 
+                            paralelo=paralelo, pvs=pvs
+                        )
+                    else:
+                        traza_i, v_i = negamax_en_sitio(
+                            juego=juego, estado=estado, jugador=jugador,  
+                            alpha=alpha, beta=beta, ordena=ordena, d=prof, 
+                            evalua=evalua, transp=transp, traza=traza[:], 
+                            reloj=reloj, estadisticas=iteracion, 
+                            heuristicas=heuristicas, pvs=pvs, 
+                            evalua_lotes=evalua_lotes
+                        )
+                    # Fuera de la ventana el valor sólo es una cota
+                    if v_i <= alpha:
+                        abajo *= ampliacion
+                        alpha = max(v - abajo, -1e10)
+                    elif v_i >= beta:
+                        arriba *= ampliacion
+                        beta = min(v + arriba, 1e10)
+                    else:
+                        break
+                    reloj.parcial = None
+                traza, v = traza_i, v_i
+            except TiempoAgotado:
+                completa = False
+                traza_i, v_i = [], None
+                if reloj.parcial != None:
+                    traza, v = traza_i, v_i = reloj.parcial
+            registro = {
+                'd': prof, 'valor': v_i, 'traza': traza_i, 
+                'tiempo': time() - t0, 'completa': completa,
+                'busquedas': busquedas
+            }
+            if iteracion != None:
+                registro['estadisticas'] = iteracion.como_dict()
+                registro['nodos'] = iteracion.nodos
+                registro['tiempo_iteracion'] = time() - t_iteracion
+                registro['ebf'] = (
+                    iteracion.nodos / nodos_antes if nodos_antes else None
+                )
+                nodos_antes = iteracion.nodos
+            if estadisticas != None:
+                if iteracion != None:
+                    estadisticas.suma(iteracion)
+                estadisticas.iteraciones.append(registro)
+            if informe != None:
+                informe(registro)
+            if not completa:
+                break
+            prof += 1
+    finally:
+        if paralelo != None:
+            paralelo.cierra()
+    if not traza:
+        # No se alcanzó a terminar ninguna jugada: se busca a 
+        # profundidad 1 sin límite de tiempo para tener alguna
+        traza, v = negamax_en_sitio(
+            juego=juego, estado=estado, jugador=jugador, 
+            ordena=ordena, d=1, evalua=evalua, transp=transp, traza=[],
+            evalua_lotes=evalua_lotes
+        )
+    return traza, v
+
+
+def imprime_informe(registro):
+    """
+    Función para el parámetro informe de negamax_iterativo que imprime
+    una línea por iteración
+
+    """
+    valor = registro['valor']
+    valor = "-" if valor == None else f"{valor:+.3f}"
+    linea = (f"d={registro['d']:<3} v={valor:<8} "
+             f"t={registro['tiempo']:.3f}s")
+    if 'estadisticas' in registro:
+        e = registro['estadisticas']
+        ebf = registro['ebf']
+        linea += (
+            f" nodos={e['nodos']} hojas={e['hojas']}"
+            f" tt={e['tt_aciertos']}/{e['tt_consultas']}"
+            f" cortes_tt={e['tt_cortes']} cortes_beta={e['cortes_beta']}"
+            f" primera={100 * e['tasa_primera']:.0f}%"
+            + (f" ebf={ebf:.2f}" if ebf else "")
+        )
+    if not registro['completa']:
+        linea += " (interrumpida)"
+    print(linea)
+
+
+def minimax_iterativo(
+    juego, estado, jugador, tiempo=10,
+    ordena=None, d=None, evalua=None, informe=None, procesos=None
     ):  
     """
     Devuelve la mejor jugada para el jugador en el estado
     acotando a un periodo de tiempo
     
     """
-    t0 = time()
-    d, traza = 2, []
-    while time() - t0 < tiempo/2:
-        traza, v = negamax(
-            juego=juego, estado=estado, jugador=jugador,  
-            alpha=-1e10, beta=1e10, ordena=ordena, d=d, evalua=evalua, 
-            transp={}, traza=traza
-        )
-        d += 1
+    traza, _ = negamax_iterativo(
+        juego, estado, jugador, tiempo=tiempo, 
+        ordena=ordena, d=d, evalua=evalua, informe=informe, 
+        procesos=procesos
+    )
     return traza[0]
+
+
+def variante_principal(juego, estado, jugador, transp, traza=()):
+    """
+    Sigue la traza y después las mejores jugadas guardadas en la tabla 
+    de transposición, hasta llegar a un estado terminal o a un estado
+    que no está en la tabla
+
+    Regresa
+    -------
+    list: Jugadas de la variante
+
+    """
+    variante, vistos = [], set()
+    tiene_clave = implementa(juego, 'clave')
+    simetrico = implementa(juego, 'canonica')
+    traza = list(traza)
+    while not juego.terminal(estado):
+        llave = juego.clave(estado, jugador) if tiene_clave else estado
+        if llave in vistos:
+            break
+        vistos.add(llave)
+        if traza:
+            a = traza.pop(0)
+        else:
+            simetria = None
+            if simetrico:
+                llave, simetria = juego.canonica(llave)
+            entrada = transp.busca(llave)
+            if entrada == None or entrada[4] == None:
+                break
+            a = entrada[4]
+            if simetria != None:
+                a = juego.destransforma(a, simetria)
+        if a not in juego.jugadas_legales(estado, jugador):
+            break
+        variante.append(a)
+        estado, jugador = juego.transicion(estado, a, jugador), -jugador
+    return variante
+
+
+def resuelve(
+    juego, estado, jugador, primera=0, ordena=None, transp=None, 
+    heuristicas=None, reloj=None, estadisticas=None, informe=None
+    ):
+    """
+    Calcula el valor exacto del estado buscando hasta el final (d=None) 
+    con una sucesión de búsquedas de ventana nula (MTD(f))
+
+    Cada búsqueda sólo prueba si el valor es al menos beta, así que 
+    regresa una cota: si falla alto, una cota inferior, y si falla 
+    bajo, una superior. Se repite con beta en la última cota hasta que 
+    las dos cotas coinciden. Las búsquedas comparten la tabla de 
+    transposición, que guarda el tipo de cota de cada valor, así que 
+    cada una aprovecha casi todo lo que probaron las anteriores.
+
+    Parametros
+    ----------
+    primera (float): Primera aproximación del valor
+    ordena (function): Funcion de ordenamiento
+    transp (TablaTransposicion): Si None, se usa una tabla nueva
+    heuristicas (Heuristicas): Si None, se usan unas nuevas
+    reloj (Reloj): Si no es None, se lanza TiempoAgotado al llegar al
+        límite de tiempo
+    estadisticas (Estadisticas): Si no es None, se acumulan los 
+        contadores de todas las búsquedas
+    informe (function): Si no es None, se llama después de cada 
+        búsqueda con un diccionario con 'beta', el 'valor' obtenido y 
+        las cotas 'inferior' y 'superior'
+
+    Regresa
+    -------
+    tuple: (variante que prueba el valor, valor exacto)
+
+    """
+    if transp == None:
+        transp = TablaTransposicion()
+    if heuristicas == None:
+        heuristicas = Heuristicas()
+    g, inferior, superior = primera, -1e10, 1e10
+    prueba = []
+    while inferior < superior:
+        beta = g + VENTANA_NULA if g == inferior else g
+        traza, g = negamax_en_sitio(
+            juego, estado, jugador, alpha=beta - VENTANA_NULA, beta=beta,
+            ordena=ordena, transp=transp, traza=list(prueba), 
+            reloj=reloj, estadisticas=estadisticas, 
+            heuristicas=heuristicas
+        )
+        if g < beta:
+            superior = g
+        else:
+            inferior = g
+            prueba = traza
+        if informe != None:
+            informe({'beta': beta, 'valor': g, 'inferior': inferior, 
+                     'superior': superior})
+    variante = variante_principal(juego, estado, jugador, transp, prueba)
+    return variante, inferior
+
+
+class Motor:
+    """
+    Jugador que conserva lo aprendido de una búsqueda a otra
+
+    Guarda la tabla de transposición, las heurísticas de ordenamiento y
+    la variante principal entre las iteraciones de una búsqueda y entre
+    los turnos de un mismo juego.
+    Se usa como cualquier otro jugador de `juega_dos_jugadores`:
+
+        motor = Motor(ordena=ordena_centro, evalua=evalua_3con, tiempo=5)
+        juega_dos_jugadores(juego, motor, jugador_manual_conecta4)
+
+    Antes de empezar otro juego hay que llamar a `reinicia`.
+
+    Con `juega_dos_jugadores(..., pondera=True)`, mientras piensa el 
+    rival se llama a `pondera`, que busca en otro hilo la posición a la
+    que se llega si el rival hace la jugada que se espera, y al final a
+    `detiene`. El hilo compite por el intérprete con el resto del 
+    proceso, así que sólo se debe ponderar contra un jugador humano o 
+    externo, no contra otro motor del mismo proceso.
+
+    Parametros
+    ----------
+    ordena (function): Funcion de ordenamiento
+    evalua (function): Funcion de evaluación
+    d (int): Profundidad. Si tiempo no es None, profundidad máxima
+    tiempo (float): Si no es None, se busca con profundidad iterativa
+    entradas, mb: Tamaño de la tabla de transposición
+    informe (function): Se pasa a negamax_iterativo
+    pvs (bool): Se pasa a negamax
+    aspiracion (float): Se pasa a negamax_iterativo
+    evalua_lotes (function): Se pasa a negamax
+    libro (Libro): Si no es None, libro de aperturas (ver libro.py) 
+        que se consulta antes de buscar
+
+    """
+    def __init__(
+        self, ordena=None, evalua=None, d=None, tiempo=None, 
+        entradas=2**20, mb=None, informe=None, pvs=False, aspiracion=None,
+        evalua_lotes=None, libro=None
+        ):
+        self.ordena = ordena
+        self.pvs = pvs
+        self.aspiracion = aspiracion
+        self.evalua_lotes = evalua_lotes
+        self.libro = libro
+        self.evalua = evalua
+        self.informe = informe
+        self.d = d
+        self.tiempo = tiempo
+        self.transp = TablaTransposicion(entradas, mb)
+        self.heuristicas = Heuristicas()
+        self.hilo = None
+        self.reinicia()
+
+    def reinicia(self):
+        """
+        Olvida todo lo aprendido, para empezar un juego nuevo
+
+        """
+        self.detiene()
+        self.ponderado = None
+        self.transp.limpia()
+        self.heuristicas.limpia()
+        self.traza = []
+        self.esperado = None
+
+    def envejece(self):
+        """
+        Permite que la tabla de transposición reemplace lo que se
+        guardó en búsquedas anteriores, y reduce la historia
+
+        """
+        self.transp.envejece()
+        self.heuristicas.envejece()
+
+    def busca(self, juego, estado, jugador):
+        """
+        Devuelve (lista mejores jugadas, valor) para el jugador en el
+        estado
+
+        Si el estado está en el libro se regresa la jugada del libro.
+        Si no, y el rival hizo la jugada que se esperaba, se empieza por
+        lo que queda de la variante principal anterior, o por la que se 
+        encontró al ponderar, con lo que ya quedó en la tabla de 
+        transposición. Si al ponderar se alcanzó a buscar hasta la 
+        profundidad máxima, se usa ese resultado sin buscar.
+
+        """
+        self.detiene()
+        ponderado, self.ponderado = self.ponderado, None
+        if self.libro != None:
+            encontrado = self.libro.jugada(juego, estado, jugador)
+            if encontrado != None:
+                a, v = encontrado
+                self.traza, self.esperado = [a], None
+                return [a], v
+        traza = self.traza[2:] if estado == self.esperado else []
+        if ponderado != None and estado == self.esperado:
+            traza, v, completo = ponderado
+        else:
+            completo = False
+            self.envejece()
+        if completo:
+            pass
+        elif self.tiempo != None:
+            traza, v = negamax_iterativo(
+                juego, estado, jugador, tiempo=self.tiempo, 
+                ordena=self.ordena, d=self.d, evalua=self.evalua, 
+                transp=self.transp, traza=traza, informe=self.informe,
+                heuristicas=self.heuristicas, pvs=self.pvs, 
+                aspiracion=self.aspiracion, evalua_lotes=self.evalua_lotes
+            )
+        else:
+            traza, v = negamax_en_sitio(
+                juego, estado, jugador, ordena=self.ordena, d=self.d, 
+                evalua=self.evalua, transp=self.transp, traza=traza[:],
+                heuristicas=self.heuristicas, pvs=self.pvs,
+                evalua_lotes=self.evalua_lotes
+            )
+        self.traza = traza
+        self.esperado = None
+        if len(traza) >= 2:
+            s = juego.transicion(estado, traza[0], jugador)
+            if not juego.terminal(s):
+                self.esperado = juego.transicion(s, traza[1], -jugador)
+        return traza, v
+
+    def pondera(self, juego, estado, jugador):
+        """
+        Empieza a buscar en otro hilo, sin límite de tiempo, el estado al
+        que se llega si el jugador (el rival, en turno en estado) hace 
+        la jugada que se espera. La búsqueda sigue hasta que se llama a
+        `detiene` o a `busca`
+
+        """
+        self.detiene()
+        if self.esperado == None or len(self.traza) < 2:
+            return
+        if juego.transicion(estado, self.traza[1], jugador) != self.esperado:
+            return
+        self.envejece()
+        self.reloj = Reloj(float('inf'))
+        esperado, traza = self.esperado, self.traza[2:]
+
+        def pondera():
+            traza_p, v_p = negamax_iterativo(
+                juego, esperado, -jugador, tiempo=float('inf'), 
+                ordena=self.ordena, d=self.d, evalua=self.evalua, 
+                transp=self.transp, traza=traza, 
+                heuristicas=self.heuristicas, pvs=self.pvs, 
+                aspiracion=self.aspiracion, evalua_lotes=self.evalua_lotes,
+                reloj=self.reloj
+            )
+            self.ponderado = traza_p, v_p, not self.reloj.cancelado
+
+        self.hilo = Thread(target=pondera, daemon=True)
+        self.hilo.start()
+
+    def detiene(self):
+        """
+        Cancela la búsqueda de `pondera`, si hay una, y espera a que
+        termine
+
+        """
+        if self.hilo != None:
+            self.reloj.cancela()
+            self.hilo.join()
+            self.hilo = None
+
+    def __call__(self, juego, estado, jugador):
+        traza, _ = self.busca(juego, estado, jugador)
+        return traza[0]
@@ -35,16 +35,84 @@ pero si para el otro se omite el turno.
 En dicho caso consideraré omitir turno como una acción legal
 y la representaré como `None`.
 
+`OtelloBits` es el mismo juego con el estado representado como una
+tupla `(negras, blancas)` de dos enteros de 64 bits, donde el bit
+`8*i + j` está prendido si hay una ficha de ese color en la casilla
+`(i, j)`. Las acciones son las mismas, así que `ordenar`,
+`pprint_estado` y `jugador_manual` sirven para los dos modelos.
+
+`OtelloIncremental` es Otello con la frontera (las casillas vacías junto 
+a alguna ficha) en el tablero mutable de la búsqueda, para sólo buscar 
+jugadas en ella.
+
+Con pocas casillas vacías `FinalOtello` busca hasta el final del juego
+el valor exacto, y los jugadores de `crear_jugador_artificial` lo usan
+en lugar de la búsqueda con evaluación.
+
 """
 
 from juegos_simplificado import ModeloJuegoZT2
+from juegos_simplificado import Tablero
 from juegos_simplificado import juega_dos_jugadores
+from juegos_simplificado import tabla_zobrist
+from juegos_simplificado import simetrias_cuadrado
+from juegos_simplificado import zobrist_simetrico
+from juegos_simplificado import canonica_empacada
 from random import choice
 from re import match
-from minimax import jugador_negamax
-from minimax import minimax_iterativo
+from time import time
+from minimax import Motor, TablaTransposicion, Reloj, TiempoAgotado
+from minimax import EXACTO, COTA_INF, COTA_SUP
+
+# Con simetrias=True las claves llevan empacadas las de los 8 tableros 
+# simétricos, para que las posiciones simétricas compartan entrada en la
+# tabla de transposición
+SIMETRIAS = simetrias_cuadrado(8)
+ZOBRIST, TURNO = tabla_zobrist(64)
+ZOBRIST_SIMETRICO, TURNO_SIMETRICO = zobrist_simetrico(
+    ZOBRIST, TURNO, SIMETRIAS
+)
+
+# INVERSAS[t][k]: casilla del tablero transformado con la simetría t 
+# donde queda la casilla k del original
+INVERSAS = tuple(
+    tuple(p.index(k) for k in range(64)) for p in SIMETRIAS
+)
+
+def transforma_jugada(a, t):
+    """
+    Jugada en el tablero transformado con la simetría t que corresponde
+    a la jugada a (una tupla (i, j) o None) del original
+
+    """
+    return None if a == None else divmod(INVERSAS[t][8*a[0] + a[1]], 8)
+
+def destransforma_jugada(a, t):
+    """
+    Inversa de transforma_jugada
+
+    """
+    return None if a == None else divmod(SIMETRIAS[t][8*a[0] + a[1]], 8)
 
 class Otello(ModeloJuegoZT2):
+    """
+    Otello con el estado como tupla de 64 casillas
+
+    Parametros
+    ----------
+    simetrias (bool): Si es True, las posiciones simétricas comparten
+        entrada en la tabla de transposición. Ahorra nodos en la 
+        apertura, pero con claves de 512 bits cada nodo es más lento y
+        en el medio juego la búsqueda tarda más
+
+    """
+    def __init__(self, simetrias=False):
+        self.simetrias = simetrias
+        self.zobrist, self.turno, self.cambio = (
+            (ZOBRIST_SIMETRICO, TURNO_SIMETRICO, CAMBIO_SIMETRICO) 
+            if simetrias else (ZOBRIST, TURNO, CAMBIO_ZOBRIST)
+        )
+
     def inicializa(self):
         return ((0, 0, 0, 0, 0, 0, 0, 0,
         		 0, 0, 0, 0, 0, 0, 0, 0,
@@ -57,47 +125,60 @@ class Otello(ModeloJuegoZT2):
         		1)
 
     def jugadas_legales(self, s, jugador):
-        def es_legal(a):
-            if s[a[0] * 8 + a[1]] != 0:
-                return False
-
-            for inc_i in (-1,0,1):
-                for inc_j in (-1,0,1):
-                    i = a[0] + inc_i
-                    j = a[1] + inc_j
-
-                    if((inc_i == inc_j == 0) or
-                       (not (0 <= i < 8)) or 
-                       (not (0 <= j < 8)) or
-                       (s[i * 8 + j] != -jugador)):
-                            continue
-
-                    i += inc_i
-                    j += inc_j
-
-                    while (0 <= i < 8) and (0 <= j < 8): 
-                        if s[i * 8 + j] == jugador:
-                            return True
-                        if s[i * 8 + j] == 0:
-                            break
-                        i += inc_i
-                        j += inc_j
-            return False
-
         acciones = ()
         for fila in range(8):
             for columna in range(8):
                 accion = (fila, columna)
-                if es_legal(accion):
+                if self.es_legal(s, accion, jugador):
                     acciones += (accion,)
 
         return (acciones if acciones else (None,))
 
+    def es_legal(self, s, a, jugador):
+        if s[a[0] * 8 + a[1]] != 0:
+            return False
+
+        for inc_i in (-1,0,1):
+            for inc_j in (-1,0,1):
+                i = a[0] + inc_i
+                j = a[1] + inc_j
+
+                if((inc_i == inc_j == 0) or
+                   (not (0 <= i < 8)) or 
+                   (not (0 <= j < 8)) or
+                   (s[i * 8 + j] != -jugador)):
+                        continue
+
+                i += inc_i
+                j += inc_j
+
+                while (0 <= i < 8) and (0 <= j < 8): 
+                    if s[i * 8 + j] == jugador:
+                        return True
+                    if s[i * 8 + j] == 0:
+                        break
+                    i += inc_i
+                    j += inc_j
+        return False
+
     def transicion(self, s, a, jugador):
         if a == None:
             return s
 
         estado = list(s)
+        self.voltea(estado, a, jugador)
+        return tuple(estado)
+
+    def voltea(self, estado, a, jugador):
+        """
+        Pone la ficha del jugador en la casilla a de la lista estado
+        y voltea las fichas rivales que quedan encerradas
+
+        Devuelve la lista de los índices de las casillas que se
+        voltearon.
+
+        """
+        volteadas = []
         for inc_i in (-1,0,1):
             for inc_j in (-1,0,1):
                 if inc_i == inc_j == 0:
@@ -126,9 +207,10 @@ class Otello(ModeloJuegoZT2):
                     j -= inc_j
                     contador -= 1
                     estado[i * 8 + j] = jugador
+                    volteadas.append(i * 8 + j)
 
         estado[a[0]*8 + a[1]] = jugador
-        return tuple(estado)
+        return volteadas
 
     def ganancia(self, s):
         suma_piezas = sum(s)
@@ -139,6 +221,357 @@ class Otello(ModeloJuegoZT2):
         return (self.jugadas_legales(s,1) == (None,) ==
                 self.jugadas_legales(s,-1))
 
+    def expande(self, s, jugador):
+        # terminal necesita las jugadas de los dos jugadores, así que
+        # se generan una sola vez para todo el nodo
+        acciones = self.jugadas_legales(s, jugador)
+        if acciones != (None,):
+            return False, 0, list(acciones)
+        if self.jugadas_legales(s, -jugador) != (None,):
+            return False, 0, [None]
+        return True, self.ganancia(s), []
+
+    def clave(self, s, jugador):
+        clave = 0 if jugador == 1 else self.turno
+        for i in range(64):
+            if s[i] != 0:
+                clave ^= self.zobrist[s[i]][i]
+        return clave
+
+    def transicion_clave(self, s, clave, a, jugador):
+        if a == None:
+            return s, clave ^ self.turno
+
+        estado = list(s)
+        volteadas = self.voltea(estado, a, jugador)
+        clave ^= self.zobrist[jugador][a[0]*8 + a[1]] ^ self.turno
+        for i in volteadas:
+            clave ^= self.zobrist[jugador][i] ^ self.zobrist[-jugador][i]
+        return tuple(estado), clave
+
+    def mutable(self, s, jugador):
+        return Tablero(s, self.clave(s, jugador))
+
+    def hace(self, m, a, jugador):
+        m.clave ^= self.turno
+        if a == None:
+            m.pila.append(None)
+            return
+
+        volteadas = self.voltea(m.casillas, a, jugador)
+        m.clave ^= self.zobrist[jugador][a[0]*8 + a[1]]
+        for i in volteadas:
+            m.clave ^= self.zobrist[jugador][i] ^ self.zobrist[-jugador][i]
+        m.pila.append((a[0]*8 + a[1], volteadas))
+
+    def deshace(self, m):
+        c = m.casillas
+        m.clave ^= self.turno
+        jugada = m.pila.pop()
+        if jugada == None:
+            return
+
+        casilla, volteadas = jugada
+        jugador = c[casilla]
+        m.clave ^= self.zobrist[jugador][casilla]
+        c[casilla] = 0
+        for i in volteadas:
+            m.clave ^= self.zobrist[jugador][i] ^ self.zobrist[-jugador][i]
+            c[i] = -jugador
+
+    def canonica(self, clave):
+        if not self.simetrias:
+            return clave, None
+        return canonica_empacada(clave, len(SIMETRIAS))
+
+    def transforma(self, a, t):
+        return transforma_jugada(a, t)
+
+    def destransforma(self, a, t):
+        return destransforma_jugada(a, t)
+
+LLENO = (1 << 64) - 1
+SIN_COL_A = LLENO & ~sum(1 << (8 * i) for i in range(8))
+SIN_COL_H = LLENO & ~sum(1 << (8 * i + 7) for i in range(8))
+ESQUINAS = (1 << 0) | (1 << 7) | (1 << 56) | (1 << 63)
+
+# (desplazamiento, máscara) para cada una de las 8 direcciones; la
+# máscara quita las fichas que al recorrerse se pasarían de renglón
+DIRECCIONES = ((1, SIN_COL_A), (-1, SIN_COL_H),
+               (8, LLENO), (-8, LLENO),
+               (9, SIN_COL_A), (7, SIN_COL_H),
+               (-7, SIN_COL_A), (-9, SIN_COL_H))
+
+def recorre(x, d, mascara):
+    return (x << d if d > 0 else x >> -d) & mascara
+
+def movimientos(propias, rivales):
+    """
+    Devuelve el tablero de bits con todas las casillas donde puede
+    tirar quien tiene las fichas `propias`
+
+    En cada dirección se recorren a la vez todas las líneas de fichas
+    rivales pegadas a una ficha propia, y la casilla vacía que sigue
+    a cada línea es una jugada legal.
+
+    """
+    vacias = ~(propias | rivales) & LLENO
+    legales = 0
+    for d, mascara in DIRECCIONES:
+        x = recorre(propias, d, mascara) & rivales
+        for _ in range(5):
+            x |= recorre(x, d, mascara) & rivales
+        legales |= recorre(x, d, mascara) & vacias
+    return legales
+
+def volteadas(propias, rivales, casilla):
+    """
+    Devuelve el tablero de bits con las fichas rivales que se voltean
+    al tirar en `casilla` (un tablero de bits con un solo bit)
+
+    """
+    voltea = 0
+    for d, mascara in DIRECCIONES:
+        x = recorre(casilla, d, mascara) & rivales
+        for _ in range(5):
+            x |= recorre(x, d, mascara) & rivales
+        if recorre(x, d, mascara) & propias:
+            voltea |= x
+    return voltea
+
+# Lo que cambia la clave de Zobrist al voltear la ficha de cada casilla
+CAMBIO_ZOBRIST = [ZOBRIST[1][i] ^ ZOBRIST[-1][i] for i in range(64)]
+CAMBIO_SIMETRICO = [
+    ZOBRIST_SIMETRICO[1][i] ^ ZOBRIST_SIMETRICO[-1][i] for i in range(64)
+]
+
+def clave_volteadas(voltea, cambio=CAMBIO_ZOBRIST):
+    """
+    Devuelve lo que cambia la clave de Zobrist al voltear las fichas
+    del tablero de bits `voltea`, con los cambios por casilla `cambio`
+    (CAMBIO_ZOBRIST o CAMBIO_SIMETRICO)
+
+    """
+    clave = 0
+    while voltea:
+        casilla = voltea & -voltea
+        clave ^= cambio[casilla.bit_length() - 1]
+        voltea ^= casilla
+    return clave
+
+def vecindad(x):
+    """
+    Devuelve el tablero de bits con las casillas vecinas (en las 8
+    direcciones) de alguna casilla de x
+
+    """
+    vecinas = 0
+    for d, mascara in DIRECCIONES:
+        vecinas |= recorre(x, d, mascara)
+    return vecinas
+
+# Vecinas de cada casilla
+VECINAS = tuple(vecindad(1 << i) for i in range(64))
+
+def frontera(negras, blancas):
+    """
+    Devuelve el tablero de bits con las casillas vacías junto a alguna
+    ficha, que son las únicas donde se puede tirar
+
+    """
+    ocupadas = negras | blancas
+    return vecindad(ocupadas) & ~ocupadas
+
+class OtelloBits(ModeloJuegoZT2):
+    """
+    Otello con tableros de bits; el parámetro simetrias es como en 
+    `Otello`
+
+    """
+    def __init__(self, simetrias=False):
+        self.simetrias = simetrias
+        self.zobrist, self.turno, self.cambio = (
+            (ZOBRIST_SIMETRICO, TURNO_SIMETRICO, CAMBIO_SIMETRICO) 
+            if simetrias else (ZOBRIST, TURNO, CAMBIO_ZOBRIST)
+        )
+
+    def inicializa(self):
+        return ((1 << 28) | (1 << 35), (1 << 27) | (1 << 36)), 1
+
+    def jugadas_legales(self, s, jugador):
+        negras, blancas = s
+        legales = (movimientos(negras, blancas) if jugador == 1 else
+                   movimientos(blancas, negras))
+        acciones = []
+        while legales:
+            casilla = legales & -legales
+            acciones.append(divmod(casilla.bit_length() - 1, 8))
+            legales ^= casilla
+        return (tuple(acciones) if acciones else (None,))
+
+    def transicion(self, s, a, jugador):
+        if a == None:
+            return s
+
+        negras, blancas = s
+        casilla = 1 << (a[0] * 8 + a[1])
+        if jugador == 1:
+            voltea = volteadas(negras, blancas, casilla)
+            return negras | voltea | casilla, blancas ^ voltea
+        voltea = volteadas(blancas, negras, casilla)
+        return negras ^ voltea, blancas | voltea | casilla
+
+    def ganancia(self, s):
+        diferencia = s[0].bit_count() - s[1].bit_count()
+        return (1 if diferencia > 0 else
+                0 if diferencia == 0 else -1)
+
+    def terminal(self, s):
+        return not (movimientos(s[0], s[1]) or movimientos(s[1], s[0]))
+
+    def expande(self, s, jugador):
+        propias, rivales = (s[0], s[1]) if jugador == 1 else (s[1], s[0])
+        legales = movimientos(propias, rivales)
+        if legales:
+            acciones = []
+            while legales:
+                casilla = legales & -legales
+                acciones.append(divmod(casilla.bit_length() - 1, 8))
+                legales ^= casilla
+            return False, 0, acciones
+        if movimientos(rivales, propias):
+            return False, 0, [None]
+        return True, self.ganancia(s), []
+
+    def clave(self, s, jugador):
+        clave = 0 if jugador == 1 else self.turno
+        for j, fichas in ((1, s[0]), (-1, s[1])):
+            while fichas:
+                casilla = fichas & -fichas
+                clave ^= self.zobrist[j][casilla.bit_length() - 1]
+                fichas ^= casilla
+        return clave
+
+    def transicion_clave(self, s, clave, a, jugador):
+        s2 = self.transicion(s, a, jugador)
+        clave ^= self.turno
+        if a != None:
+            clave ^= self.zobrist[jugador][a[0]*8 + a[1]]
+            voltea = s[1] ^ s2[1] if jugador == 1 else s[0] ^ s2[0]
+            clave ^= clave_volteadas(voltea, self.cambio)
+        return s2, clave
+
+    def mutable(self, s, jugador):
+        return Tablero(s, self.clave(s, jugador))
+
+    def hace(self, m, a, jugador):
+        c = m.casillas
+        m.clave ^= self.turno
+        if a == None:
+            m.pila.append(None)
+            return
+
+        i = a[0]*8 + a[1]
+        propias, rivales = (0, 1) if jugador == 1 else (1, 0)
+        voltea = volteadas(c[propias], c[rivales], 1 << i)
+        c[propias] |= voltea | (1 << i)
+        c[rivales] ^= voltea
+        m.clave ^= (
+            self.zobrist[jugador][i] ^ clave_volteadas(voltea, self.cambio)
+        )
+        m.pila.append((i, voltea))
+
+    def deshace(self, m):
+        c = m.casillas
+        m.clave ^= self.turno
+        jugada = m.pila.pop()
+        if jugada == None:
+            return
+
+        i, voltea = jugada
+        jugador = 1 if c[0] >> i & 1 else -1
+        propias, rivales = (0, 1) if jugador == 1 else (1, 0)
+        c[propias] ^= voltea | (1 << i)
+        c[rivales] |= voltea
+        m.clave ^= (
+            self.zobrist[jugador][i] ^ clave_volteadas(voltea, self.cambio)
+        )
+
+    def canonica(self, clave):
+        if not self.simetrias:
+            return clave, None
+        return canonica_empacada(clave, len(SIMETRIAS))
+
+    def transforma(self, a, t):
+        return transforma_jugada(a, t)
+
+    def destransforma(self, a, t):
+        return destransforma_jugada(a, t)
+
+class OtelloIncremental(Otello):
+    """
+    Otello que, al buscar sobre un tablero mutable, lleva la frontera:
+    las casillas vacías junto a alguna ficha
+
+    Las casillas del tablero mutable son las 64 del estado más los 
+    tableros de bits de las negras, de las blancas y de la frontera en
+    las posiciones 64, 65 y 66, que se actualizan en `hace` y 
+    `deshace`. Así `jugadas_legales` sólo revisa las casillas de la 
+    frontera junto a una ficha rival, y `evaluar_inc` y 
+    `evaluar_movilidad_inc` no recorren el tablero. Con estados de 64 
+    casillas es igual que Otello.
+
+    """
+    def jugadas_legales(self, s, jugador):
+        if len(s) == 64:
+            return Otello.jugadas_legales(self, s, jugador)
+        candidatas = s[66] & vecindad(s[65] if jugador == 1 else s[64])
+        acciones = []
+        while candidatas:
+            casilla = candidatas & -candidatas
+            accion = divmod(casilla.bit_length() - 1, 8)
+            if self.es_legal(s, accion, jugador):
+                acciones.append(accion)
+            candidatas ^= casilla
+        return (tuple(acciones) if acciones else (None,))
+
+    def ganancia(self, s):
+        return Otello.ganancia(self, s[:64])
+
+    def mutable(self, s, jugador):
+        negras, blancas = tupla_a_bits(s)
+        return Tablero(
+            list(s) + [negras, blancas, frontera(negras, blancas)], 
+            self.clave(s, jugador)
+        )
+
+    def hace(self, m, a, jugador):
+        c = m.casillas
+        anteriores = c[64], c[65], c[66]
+        Otello.hace(self, m, a, jugador)
+        if a != None:
+            i, volteadas = m.pila[-1]
+            voltea = 0
+            for k in volteadas:
+                voltea |= 1 << k
+            propias, rivales = (64, 65) if jugador == 1 else (65, 64)
+            c[propias] |= voltea | (1 << i)
+            c[rivales] ^= voltea
+            c[66] = (c[66] | VECINAS[i]) & ~(c[64] | c[65])
+        m.pila.append(anteriores)
+
+    def deshace(self, m):
+        m.casillas[64:67] = m.pila.pop()
+        Otello.deshace(self, m)
+
+    def inmutable(self, m):
+        return tuple(m.casillas[:64])
+
+def bits_a_tupla(s):
+    negras, blancas = s
+    return tuple(1 if negras >> i & 1 else -1 if blancas >> i & 1 else 0
+                 for i in range(64))
+
 def evaluar(s):
     salida = 0
     for i in range(64):
@@ -151,6 +584,54 @@ def evaluar(s):
 
     return 0
 
+def evaluar_bits(s):
+    negras, blancas = s
+    salida = negras.bit_count() - blancas.bit_count()
+    salida += 9*((negras & ESQUINAS).bit_count() -
+                 (blancas & ESQUINAS).bit_count())
+
+    return salida/100
+
+def evaluar_inc(s):
+    """
+    evaluar para los estados de OtelloIncremental, con los tableros de
+    bits del tablero mutable
+
+    """
+    if len(s) == 64:
+        return evaluar(s)
+    return evaluar_bits((s[64], s[65]))
+
+def evaluar_movilidad(negras, blancas, vacias_junto):
+    """
+    Evaluación con las fichas, las esquinas, la movilidad (cuántas
+    jugadas tiene cada quien) y las fichas de frontera (las que tienen
+    alguna casilla vacía junto), que conviene que sean pocas porque son
+    las que el rival puede voltear
+
+    vacias_junto es la frontera de frontera(negras, blancas)
+
+    """
+    de_frontera = vecindad(vacias_junto)
+    salida = negras.bit_count() - blancas.bit_count()
+    salida += 9*((negras & ESQUINAS).bit_count() -
+                 (blancas & ESQUINAS).bit_count())
+    salida += 2*(movimientos(negras, blancas).bit_count() -
+                 movimientos(blancas, negras).bit_count())
+    salida -= ((negras & de_frontera).bit_count() -
+               (blancas & de_frontera).bit_count())
+
+    return salida/250
+
+def evaluar_movilidad_bits(s):
+    negras, blancas = s
+    return evaluar_movilidad(negras, blancas, frontera(negras, blancas))
+
+def evaluar_movilidad_inc(s):
+    if len(s) == 64:
+        return evaluar_movilidad_bits(tupla_a_bits(s))
+    return evaluar_movilidad(s[64], s[65], s[66])
+
 def ordenar(jugadas, jugador):
     def casillas_peligrosas(a):
         # centro
@@ -174,9 +655,160 @@ def ordenar(jugadas, jugador):
         return 2
     return sorted(jugadas, key=casillas_peligrosas)
 
+# Finales exactos
+#
+# Con pocas casillas vacías el árbol se puede buscar hasta el final, y
+# el valor exacto (diferencia de fichas) es mejor que cualquier
+# evaluación. Las casillas vacías se llevan en una lista, en el orden
+# de `ordenar` (esquinas primero, casillas peligrosas al final), y se
+# lleva la paridad de vacías en cada cuadrante: conviene tirar primero
+# en los cuadrantes con un número impar de vacías, para quedarse con la
+# última jugada de cada región. Lejos del final se prueban primero las
+# jugadas que dejan al rival con menos movimientos (el más rápido
+# primero), que es más caro pero poda mucho más.
+
+# Cuadrante de cada casilla (bit de la paridad)
+CUADRANTE = tuple(2 * (i >= 32) + (i % 8 >= 4) for i in range(64))
+
+# Orden fijo de las casillas para el final
+ORDEN_FINAL = tuple(8 * i + j for i, j in
+                    ordenar([(i, j) for i in range(8) for j in range(8)], 1))
+
+def tupla_a_bits(s):
+    return (sum(1 << i for i in range(64) if s[i] == 1),
+            sum(1 << i for i in range(64) if s[i] == -1))
+
+def vacias_bits(s):
+    return 64 - (s[0] | s[1]).bit_count()
+
+class FinalOtello:
+    """
+    Solución exacta de los finales de otello con tableros de bits
+
+    Parametros
+    ----------
+    exacto (bool): Si es True se calcula la diferencia de fichas; si es
+        False sólo si se gana, empata o pierde, que es más rápido
+    entradas (int): Tamaño de la tabla de transposición
+    rapido (int): Con al menos estas vacías se ordena por el más rápido
+        primero; con menos, sólo por paridad
+    minimo_tt (int): Con menos vacías no se usa la tabla de transposición
+
+    """
+    def __init__(self, exacto=True, entradas=2**18, rapido=7, minimo_tt=6):
+        self.exacto = exacto
+        self.transp = TablaTransposicion(entradas)
+        self.rapido = rapido
+        self.minimo_tt = minimo_tt
+        self.nodos = 0
+        self.reloj = None
+
+    def resuelve(self, s, jugador, reloj=None):
+        """
+        Devuelve (jugada, valor) para el jugador en turno en el estado s
+
+        Parametros
+        ----------
+        s: Estado de OtelloBits, o de Otello (tupla de 64 casillas)
+        jugador (int): 1 para negras, -1 para blancas
+        reloj (Reloj): Si no es None, se lanza TiempoAgotado al llegar
+            al límite de tiempo
+
+        Regresa
+        -------
+        jugada: (i, j) o None si hay que pasar o el juego terminó
+        valor (int): Diferencia de fichas para el jugador si exacto,
+            y si no 1 si gana, 0 si empata y -1 si pierde
+
+        """
+        if len(s) == 64:
+            s = tupla_a_bits(s)
+        propias, rivales = s if jugador == 1 else (s[1], s[0])
+        ocupadas = propias | rivales
+        vacias = [i for i in ORDEN_FINAL if not ocupadas >> i & 1]
+        paridad = 0
+        for i in vacias:
+            paridad ^= 1 << CUADRANTE[i]
+        self.transp.envejece()
+        self.reloj = reloj
+        alpha, beta = (-64, 64) if self.exacto else (-1, 1)
+        v, i = self._busca(propias, rivales, alpha, beta, vacias, paridad)
+        if not self.exacto:
+            v = (v > 0) - (v < 0)
+        return (None if i == None else divmod(i, 8)), v
+
+    def _busca(self, propias, rivales, alpha, beta, vacias, paridad):
+        self.nodos += 1
+        if self.reloj != None:
+            self.reloj.revisa()
+        legales = movimientos(propias, rivales)
+        if not legales:
+            if not movimientos(rivales, propias):
+                return propias.bit_count() - rivales.bit_count(), None
+            v, _ = self._busca(
+                rivales, propias, -beta, -alpha, vacias, paridad
+            )
+            return -v, None
+
+        alpha_0, a_tt, clave = alpha, None, None
+        if len(vacias) >= self.minimo_tt:
+            clave = (propias, rivales)
+            entrada = self.transp.busca(clave)
+            if entrada != None:
+                _, v, _, tipo, a_tt, _ = entrada
+                if (tipo == EXACTO or (tipo == COTA_INF and v >= beta) or
+                    (tipo == COTA_SUP and v <= alpha)):
+                    return v, a_tt
+
+        hijos = []
+        for i in vacias:
+            if legales >> i & 1:
+                casilla = 1 << i
+                voltea = volteadas(propias, rivales, casilla)
+                hijos.append((i, propias | voltea | casilla, rivales ^ voltea))
+        if len(vacias) >= self.rapido:
+            hijos.sort(key=lambda h: movimientos(h[2], h[1]).bit_count())
+        else:
+            hijos.sort(key=lambda h: not paridad >> CUADRANTE[h[0]] & 1)
+        if a_tt != None:
+            hijos.sort(key=lambda h: h[0] != a_tt)
+
+        v, mejor = -65, None
+        for n, (i, p2, r2) in enumerate(hijos):
+            resto = [k for k in vacias if k != i]
+            paridad2 = paridad ^ 1 << CUADRANTE[i]
+            # Los valores son enteros, así que la ventana nula es de 1
+            if n > 0 and beta - alpha > 1:
+                v2, _ = self._busca(
+                    r2, p2, -alpha - 1, -alpha, resto, paridad2
+                )
+                if alpha < -v2 < beta:
+                    v2, _ = self._busca(
+                        r2, p2, -beta, v2, resto, paridad2
+                    )
+            else:
+                v2, _ = self._busca(
+                    r2, p2, -beta, -alpha, resto, paridad2
+                )
+            v2 = -v2
+            if v2 > v:
+                v, mejor = v2, i
+            if v > alpha:
+                alpha = v
+            if alpha >= beta:
+                break
+
+        if clave != None:
+            tipo = (COTA_SUP if v <= alpha_0 else
+                    COTA_INF if v >= beta else EXACTO)
+            self.transp.guarda(clave, v, len(vacias), tipo, mejor)
+        return v, mejor
+
 # se muestra con un `*` las casillas indicadas por
 # `acciones`, esto se usa para mostrar las acciones legales
 def pprint_estado(s,acciones=()):
+    if len(s) == 2:
+        s = bits_a_tupla(s)
     acciones = list(acciones)
     print(' |', end='')
     for i in 'abcdefgh':
@@ -199,21 +831,46 @@ def pprint_estado(s,acciones=()):
 def pprint_accion(accion, fin='\n'):
     print('abcdefgh'[accion[1]] + str(accion[0]+1),end=fin)
 
-def crear_jugador_artificial(es_iterativo, num):
+def crear_jugador_artificial(
+    es_iterativo, num, evalua=evaluar, libro=None, vacias_exacto=10,
+    vacias_gana=14
+    ):
+    """
+    Crea un jugador que busca con negamax (iterativo con num segundos,
+    o a profundidad num) hasta que quedan vacias_gana casillas vacías;
+    desde ahí resuelve el final para ganar, y con vacias_exacto o menos
+    resuelve la diferencia exacta de fichas
+
+    Si es iterativo, el final se resuelve con la mitad del tiempo; si 
+    no alcanza, se busca con negamax en el tiempo que queda.
+
+    """
+    if es_iterativo:
+        motor = Motor(ordena=ordenar, evalua=evalua, tiempo=num, libro=libro)
+    else:
+        motor = Motor(ordena=ordenar, evalua=evalua, d=num, libro=libro)
+    finales = {True: FinalOtello(exacto=True), False: FinalOtello(exacto=False)}
 
     def jugador(juego, estado, jugador):
         acciones = juego.jugadas_legales(estado,jugador)
         pprint_estado(estado,acciones)
 
-        accion = None
-        if es_iterativo:
-            accion = minimax_iterativo(
-                juego, estado, jugador,
-                ordena=ordenar, evalua=evaluar, tiempo=num)
-        else:
-            accion = jugador_negamax(
-                juego, estado, jugador,
-                ordena=ordenar, evalua=evaluar, d=num)
+        vacias = (estado.count(0) if len(estado) == 64 else
+                  vacias_bits(estado))
+        resuelto = False
+        if vacias <= vacias_gana:
+            t0 = time()
+            reloj = Reloj(t0 + num / 2) if es_iterativo else None
+            try:
+                accion, _ = finales[vacias <= vacias_exacto].resuelve(
+                    estado, jugador, reloj
+                )
+                resuelto = True
+            except TiempoAgotado:
+                motor.tiempo = num - (time() - t0)
+        if not resuelto:
+            accion = motor(juego, estado, jugador)
+            motor.tiempo = num if es_iterativo else None
 
         if accion == None:
             print('\nNo hay acciones legales para las piezas ',end='')
@@ -224,6 +881,10 @@ def crear_jugador_artificial(es_iterativo, num):
 
         return accion
 
+    # Para que juega_dos_jugadores(..., pondera=True) lo deje pensar en
+    # el turno del rival
+    jugador.pondera = motor.pondera
+    jugador.detiene = motor.detiene
     return jugador
 
 def jugador_manual(juego, estado, jugador):
@@ -244,9 +905,14 @@ def jugador_manual(juego, estado, jugador):
     return accion
 
 def main():
+    from os.path import exists
+    from libro import Libro
+
+    # Libro de aperturas hecho con: python libro.py otello
+    libro = Libro('libro_otello.bin') if exists('libro_otello.bin') else None
     # iterativo
-    j = crear_jugador_artificial(True,3)
-    ganancia, estado = juega_dos_jugadores(Otello(), j, j)
+    j = crear_jugador_artificial(True,3,evaluar_bits,libro)
+    ganancia, estado = juega_dos_jugadores(OtelloBits(), j, j)
     pprint_estado(estado)
     print('\nGanaron las piezas ' + ('negras' if ganancia == 1 else 'blancas') )
 
@@ -0,0 +1,110 @@
+"""
+Las claves de Zobrist que se actualizan al jugar deben ser iguales a las
+que se calculan desde cero, y negamax con tabla de transposición debe
+dar el mismo valor que una búsqueda completa sin tabla
+
+"""
+
+from functools import partial
+from random import Random
+
+import pytest
+
+from minimax import negamax, negamax_en_sitio, TablaTransposicion
+from gato import Gato
+from conect4 import Conecta4, Conecta4Bits, Conecta4Incremental
+from conect4 import ordena_centro, evalua_3con, evalua_3con_bits
+from conect4 import evalua_3con_inc
+from otello import Otello, OtelloBits, OtelloIncremental, ordenar
+from otello import evaluar, evaluar_bits, evaluar_inc
+
+
+def evalua_gato(s):
+    return (s[4] + s[0] + s[2] + s[6] + s[8]) / 10
+
+
+# (nombre, modelo, ordena, evalua, profundidad)
+MODELOS = [('gato', Gato, None, evalua_gato, 4)]
+for simetrias in (False, True):
+    sufijo = '_sim' if simetrias else ''
+    MODELOS += [
+        ('conecta4' + sufijo, partial(Conecta4, simetrias=simetrias),
+         ordena_centro, evalua_3con, 4),
+        ('conecta4_bits' + sufijo, partial(Conecta4Bits, simetrias=simetrias),
+         ordena_centro, evalua_3con_bits, 4),
+        ('conecta4_inc' + sufijo,
+         partial(Conecta4Incremental, simetrias=simetrias),
+         ordena_centro, evalua_3con_inc, 4),
+        ('otello' + sufijo, partial(Otello, simetrias=simetrias),
+         ordenar, evaluar, 3),
+        ('otello_bits' + sufijo, partial(OtelloBits, simetrias=simetrias),
+         ordenar, evaluar_bits, 3),
+        ('otello_inc' + sufijo,
+         partial(OtelloIncremental, simetrias=simetrias),
+         ordenar, evaluar_inc, 3),
+    ]
+IDS = [m[0] for m in MODELOS]
+MODELOS = [m[1:] for m in MODELOS]
+
+
+def posiciones(juego, semilla, jugadas=30):
+    """
+    Estados (s, j) de una partida al azar
+
+    """
+    azar = Random(semilla)
+    s, j = juego.inicializa()
+    estados = []
+    while not juego.terminal(s) and len(estados) < jugadas:
+        estados.append((s, j))
+        a = azar.choice(list(juego.jugadas_legales(s, j)))
+        s, j = juego.transicion(s, a, j), -j
+    return estados
+
+
+def busqueda_completa(juego, s, j, d, evalua):
+    """
+    Negamax sin poda ni tabla de transposición
+
+    """
+    if juego.terminal(s):
+        return j * juego.ganancia(s)
+    if d == 0:
+        return j * evalua(s)
+    return max(
+        -busqueda_completa(juego, juego.transicion(s, a, j), -j, d - 1, evalua)
+        for a in juego.jugadas_legales(s, j)
+    )
+
+
+@pytest.mark.parametrize('modelo, ordena, evalua, d', MODELOS, ids=IDS)
+@pytest.mark.parametrize('semilla', [0, 1])
+def test_claves_incrementales(modelo, ordena, evalua, d, semilla):
+    juego = modelo()
+    for s, j in posiciones(juego, semilla):
+        clave = juego.clave(s, j)
+        m = juego.mutable(s, j)
+        assert m.clave == clave
+        for a in juego.jugadas_legales(s, j):
+            hijo = juego.transicion(s, a, j)
+            clave_hijo = juego.clave(hijo, -j)
+            assert juego.transicion_clave(s, clave, a, j) == (
+                hijo, clave_hijo)
+            juego.hace(m, a, j)
+            assert m.clave == clave_hijo
+            juego.deshace(m)
+            assert m.clave == clave
+
+
+@pytest.mark.parametrize('modelo, ordena, evalua, d', MODELOS, ids=IDS)
+def test_negamax_igual_que_busqueda_completa(modelo, ordena, evalua, d):
+    juego = modelo()
+    for s, j in posiciones(juego, 0)[::3]:
+        v_completa = busqueda_completa(juego, s, j, d, evalua)
+        for busca in (negamax, negamax_en_sitio):
+            for pvs in (False, True):
+                _, v = busca(
+                    juego, s, j, ordena=ordena, d=d, evalua=evalua,
+                    transp=TablaTransposicion(), traza=[], pvs=pvs
+                )
+                assert v == pytest.approx(v_completa)
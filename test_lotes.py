@@ -0,0 +1,104 @@
+"""
+La búsqueda con evaluación por lotes (evalua_lotes) debe dar el mismo
+valor que la búsqueda con evalua, con todos los modelos
+
+"""
+
+import pytest
+
+from minimax import negamax, negamax_en_sitio, TablaTransposicion
+from gato import Gato
+from conect4 import Conecta4, Conecta4Bits, Conecta4Incremental
+from conect4 import ordena_centro, evalua_3con, evalua_3con_bits
+from conect4 import evalua_3con_inc
+from otello import Otello, OtelloBits, OtelloIncremental, ordenar
+from otello import evaluar, evaluar_bits, evaluar_inc
+
+
+def evalua_gato(s):
+    return (s[4] + s[0] + s[2] + s[6] + s[8]) / 10
+
+
+MODELOS = [
+    (Gato, None, evalua_gato, [4, 0]),
+    (Conecta4, ordena_centro, evalua_3con, [3, 3, 2, 4]),
+    (Conecta4Bits, ordena_centro, evalua_3con_bits, [3, 3, 2, 4]),
+    (Conecta4Incremental, ordena_centro, evalua_3con_inc, [3, 3, 2, 4]),
+    (Otello, ordenar, evaluar, [(2, 3), (2, 2)]),
+    (OtelloBits, ordenar, evaluar_bits, [(2, 3), (2, 2)]),
+    (OtelloIncremental, ordenar, evaluar_inc, [(2, 3), (2, 2)]),
+]
+
+
+def posicion(juego, jugadas):
+    s, j = juego.inicializa()
+    for a in jugadas:
+        s, j = juego.transicion(s, a, j), -j
+    return s, j
+
+
+def en_lote(evalua):
+    return lambda estados: [evalua(s) for s in estados]
+
+
+@pytest.mark.parametrize('clase, ordena, evalua, jugadas', MODELOS)
+@pytest.mark.parametrize('busca', [negamax, negamax_en_sitio])
+@pytest.mark.parametrize('d, prof_lotes', [(1, 1), (3, 1), (3, 2), (4, 2)])
+def test_lotes_igual_que_evalua(
+    clase, ordena, evalua, jugadas, busca, d, prof_lotes
+    ):
+    juego = clase()
+    s, j = posicion(juego, jugadas)
+    _, v = busca(
+        juego, s, j, ordena=ordena, d=d, evalua=evalua,
+        transp=TablaTransposicion(), traza=[]
+    )
+    _, v_lotes = busca(
+        juego, s, j, ordena=ordena, d=d, evalua_lotes=en_lote(evalua),
+        prof_lotes=prof_lotes, transp=TablaTransposicion(), traza=[]
+    )
+    assert v_lotes == pytest.approx(v)
+
+
+def test_lotes_conect4_lotes():
+    # Con NumPy o sin él, si no está instalado
+    from conect4_lotes import evalua_3con_lotes
+    for clase, evalua in ((Conecta4, evalua_3con),
+                          (Conecta4Bits, evalua_3con_bits),
+                          (Conecta4Incremental, evalua_3con_inc)):
+        juego = clase()
+        s, j = posicion(juego, [3, 3, 2, 4])
+        _, v = negamax_en_sitio(
+            juego, s, j, ordena=ordena_centro, d=4, evalua=evalua,
+            transp=TablaTransposicion(), traza=[]
+        )
+        _, v_lotes = negamax_en_sitio(
+            juego, s, j, ordena=ordena_centro, d=4,
+            evalua_lotes=evalua_3con_lotes, prof_lotes=2,
+            transp=TablaTransposicion(), traza=[]
+        )
+        assert v_lotes == pytest.approx(v)
+
+
+@pytest.mark.parametrize('clase, ordena, evalua, jugadas', MODELOS)
+def test_inmutable(clase, ordena, evalua, jugadas):
+    # La copia no cambia al seguir jugando sobre el tablero, y se puede 
+    # usar como llave
+    juego = clase()
+    s, j = posicion(juego, jugadas)
+    m = juego.mutable(s, j)
+    copia = juego.inmutable(m)
+    hash(copia)
+    for a in juego.jugadas_legales(s, j):
+        juego.hace(m, a, j)
+        assert juego.inmutable(m) == juego.transicion(s, a, j)
+        assert copia == s
+        juego.deshace(m)
+
+
+def test_prof_lotes_cero():
+    juego = Conecta4()
+    s, j = juego.inicializa()
+    with pytest.raises(ValueError):
+        negamax(juego, s, j, d=2, evalua_lotes=en_lote(evalua_3con),
+                prof_lotes=0)
@@ -0,0 +1,30 @@
+"""
+Pruebas de las búsquedas de minimax
+
+"""
+
+from time import time
+
+from minimax import negamax, Reloj
+from conect4 import Conecta4Bits, ordena_centro, evalua_3con_bits
+
+
+def test_parcial_solo_dentro_de_la_ventana():
+    # Si todas las jugadas de la raíz fallan bajo la ventana, sus
+    # valores sólo son cotas y no se guardan como resultado parcial
+    juego = Conecta4Bits()
+    s, j = juego.inicializa()
+    reloj = Reloj(time() + 1000)
+    _, v = negamax(
+        juego, s, j, alpha=0.5, beta=0.6, ordena=ordena_centro, d=3,
+        evalua=evalua_3con_bits, traza=[], reloj=reloj
+    )
+    assert v <= 0.5
+    assert reloj.parcial == None
+
+    reloj = Reloj(time() + 1000)
+    traza, v = negamax(
+        juego, s, j, ordena=ordena_centro, d=3, evalua=evalua_3con_bits,
+        traza=[], reloj=reloj
+    )
+    assert reloj.parcial == (traza, v)
@@ -0,0 +1,112 @@
+"""
+Los modelos alternativos deben comportarse igual que el modelo de
+referencia del mismo juego, en partidas al azar con semilla fija
+
+"""
+
+from random import Random
+
+import pytest
+
+from conect4 import Conecta4, Conecta4Bits, evalua_3con, evalua_3con_bits
+from conect4 import bits_a_tupla as bits_a_tupla_conecta4
+from otello import Otello, OtelloBits, evaluar, evaluar_bits
+from otello import OtelloIncremental, evaluar_inc, evaluar_movilidad_inc
+from otello import evaluar_movilidad_bits, frontera, tupla_a_bits
+from otello import bits_a_tupla as bits_a_tupla_otello
+
+
+def partida(referencia, modelo, semilla):
+    """
+    Juega una partida al azar con los dos modelos a la vez, haciendo
+    también las jugadas sobre un tablero mutable del modelo
+
+    Genera (s_ref, s, m, j) antes de cada jugada y en el estado final,
+    donde s_ref y s son el estado en cada modelo y m el tablero mutable.
+    Al terminar deshace todas las jugadas de m y revisa que regrese al
+    estado inicial.
+
+    """
+    azar = Random(semilla)
+    s_ref, j = referencia.inicializa()
+    s, _ = modelo.inicializa()
+    m = modelo.mutable(s, j)
+    jugadas = 0
+    while True:
+        yield s_ref, s, m, j
+        if referencia.terminal(s_ref):
+            break
+        a = azar.choice(sorted(
+            referencia.jugadas_legales(s_ref, j), key=str
+        ))
+        s_ref = referencia.transicion(s_ref, a, j)
+        s = modelo.transicion(s, a, j)
+        modelo.hace(m, a, j)
+        j, jugadas = -j, jugadas + 1
+    for _ in range(jugadas):
+        modelo.deshace(m)
+    assert modelo.inmutable(m) == modelo.inicializa()[0]
+
+
+def revisa_igual(referencia, modelo, s_ref, s, j):
+    """
+    Revisa que las jugadas, el final, la ganancia y expande del modelo
+    en s sean los de la referencia en s_ref
+
+    """
+    legales = sorted(referencia.jugadas_legales(s_ref, j), key=str)
+    assert sorted(modelo.jugadas_legales(s, j), key=str) == legales
+    assert modelo.terminal(s) == referencia.terminal(s_ref)
+    if referencia.terminal(s_ref):
+        assert modelo.ganancia(s) == referencia.ganancia(s_ref)
+    final, ganancia, jugadas = modelo.expande(s, j)
+    final_ref, ganancia_ref, jugadas_ref = referencia.expande(s_ref, j)
+    assert (final, ganancia) == (final_ref, ganancia_ref)
+    assert sorted(jugadas, key=str) == sorted(jugadas_ref, key=str)
+
+
+@pytest.mark.parametrize('semilla', range(20))
+def test_conecta4_bits(semilla):
+    referencia, modelo = Conecta4(), Conecta4Bits()
+    for s_ref, s, m, j in partida(referencia, modelo, semilla):
+        assert bits_a_tupla_conecta4(s) == s_ref
+        assert modelo.inmutable(m) == s
+        revisa_igual(referencia, modelo, s_ref, s, j)
+        assert evalua_3con_bits(s) == evalua_3con(s_ref)
+
+
+@pytest.mark.parametrize('semilla', range(10))
+def test_otello_bits(semilla):
+    referencia, modelo = Otello(), OtelloBits()
+    for s_ref, s, m, j in partida(referencia, modelo, semilla):
+        assert bits_a_tupla_otello(s) == s_ref
+        assert modelo.inmutable(m) == s
+        revisa_igual(referencia, modelo, s_ref, s, j)
+        assert evaluar_bits(s) == evaluar(s_ref)
+
+
+def revisa_frontera(m):
+    c = m.casillas
+    assert (c[64], c[65]) == tupla_a_bits(c[:64])
+    assert c[66] == frontera(c[64], c[65])
+
+
+@pytest.mark.parametrize('semilla', range(10))
+def test_otello_incremental(semilla):
+    referencia, modelo = Otello(), OtelloIncremental()
+    for s_ref, s, m, j in partida(referencia, modelo, semilla):
+        assert s == s_ref
+        revisa_frontera(m)
+        # Con el tablero mutable como estado
+        c = m.casillas
+        revisa_igual(referencia, modelo, s_ref, c, j)
+        assert evaluar_inc(c) == evaluar(s_ref)
+        assert evaluar_movilidad_inc(c) == evaluar_movilidad_bits(
+            tupla_a_bits(s_ref))
+        for a in referencia.jugadas_legales(s_ref, j):
+            modelo.hace(m, a, j)
+            revisa_frontera(m)
+            assert modelo.inmutable(m) == referencia.transicion(s_ref, a, j)
+            modelo.deshace(m)
+            revisa_frontera(m)
+            assert modelo.inmutable(m) == s_ref
@@ -0,0 +1,243 @@
+"""
+Torneos entre jugadores artificiales
+
+Para comparar heurísticas de ordenamiento y de evaluación se juegan muchas
+partidas entre cada par de jugadores, repartidas entre varios procesos.
+Cada partida empieza con unas cuantas jugadas al azar (con semilla, para
+poder repetir el torneo), y cada apertura se juega dos veces para que los
+dos jugadores jueguen con los dos colores.
+
+Los jugadores son funciones (juego, estado, jugador) -> jugada, igual que
+en `juega_dos_jugadores`, pero como se mandan a otros procesos no pueden
+ser funciones lambda; se puede usar functools.partial:
+
+    jugadores = {
+        'centro+3con': partial(
+            jugador_negamax, ordena=ordena_centro, evalua=evalua_3con, d=4),
+        'centro+posibles4': partial(
+            jugador_negamax, ordena=ordena_centro,
+            evalua=evalua_posibles_4con, d=4),
+    }
+    resultados = list(torneo(Conecta4(), jugadores, partidas=100))
+    imprime_resumen(resumen(resultados))
+
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import as_completed
+from functools import partial
+from itertools import combinations
+from math import log10, sqrt
+from random import Random, seed
+from time import perf_counter
+
+
+def aperturas(juego, n, plies, semilla=0):
+    """
+    Devuelve n listas de plies jugadas al azar desde el estado inicial
+
+    Se evita repetir aperturas mientras sea posible.
+
+    """
+    aleatorio = Random(semilla)
+    resultado = []
+    for _ in range(n):
+        for _ in range(100):
+            s, j = juego.inicializa()
+            apertura = []
+            for _ in range(plies):
+                if juego.terminal(s):
+                    break
+                a = aleatorio.choice(list(juego.jugadas_legales(s, j)))
+                apertura.append(a)
+                s, j = juego.transicion(s, a, j), -j
+            if apertura not in resultado:
+                break
+        resultado.append(apertura)
+    return resultado
+
+
+def juega_partida(juego, jugador1, jugador2, apertura=()):
+    """
+    Juega una partida como juega_dos_jugadores, empezando por las
+    jugadas de la apertura y midiendo el tiempo de cada jugada
+
+    Regresa
+    -------
+    tuple: (ganancia, tiempos del jugador 1, tiempos del jugador 2,
+        número de jugadas)
+
+    """
+    s, j = juego.inicializa()
+    for a in apertura:
+        s, j = juego.transicion(s, a, j), -j
+    tiempos = {1: [], -1: []}
+    jugadas = len(apertura)
+    while not juego.terminal(s):
+        t0 = perf_counter()
+        a = jugador1(juego, s, j) if j == 1 else jugador2(juego, s, j)
+        tiempos[j].append(perf_counter() - t0)
+        s, j = juego.transicion(s, a, j), -j
+        jugadas += 1
+    return juego.ganancia(s), tiempos[1], tiempos[-1], jugadas
+
+
+def _partida(juego, nombres, jugadores, apertura, semilla):
+    # Se corre en un proceso trabajador; la semilla fija el orden
+    # aleatorio de las jugadas cuando no hay función de ordenamiento
+    seed(semilla)
+    g, tiempos1, tiempos2, jugadas = juega_partida(
+        juego, jugadores[0], jugadores[1], apertura
+    )
+    return {
+        'jugador1': nombres[0], 'jugador2': nombres[1],
+        'apertura': list(apertura), 'ganancia': g, 'jugadas': jugadas,
+        'tiempos': {nombres[0]: tiempos1, nombres[1]: tiempos2},
+    }
+
+
+def torneo(
+    juego, jugadores, partidas=10, plies=2, procesos=None, semilla=0
+    ):
+    """
+    Juega partidas entre cada par de jugadores en varios procesos
+
+    Es un generador que devuelve el resultado de cada partida en cuanto
+    termina, como un diccionario con los nombres de 'jugador1' y
+    'jugador2', la 'apertura', la 'ganancia' para el jugador 1, el
+    número de 'jugadas' y los 'tiempos' de cada jugada de cada jugador.
+
+    Parametros
+    ----------
+    juego (ModeloJuegoZT2): Modelo del juego
+    jugadores (dict): Nombre -> función jugador
+    partidas (int): Partidas por cada par de jugadores (se redondea a
+        un número par, pues cada apertura se juega con los dos colores)
+    plies (int): Jugadas al azar al inicio de cada partida
+    procesos (int): Número de procesos. Si None, uno por núcleo
+    semilla (int): Semilla para las aperturas y las partidas
+
+    """
+    lista = aperturas(juego, (partidas + 1) // 2, plies, semilla)
+    with ProcessPoolExecutor(procesos) as ejecutor:
+        futuros = []
+        for a, b in combinations(jugadores, 2):
+            for apertura in lista:
+                for nombres in ((a, b), (b, a)):
+                    futuros.append(ejecutor.submit(
+                        _partida, juego, nombres,
+                        [jugadores[n] for n in nombres], apertura,
+                        semilla + len(futuros)
+                    ))
+        for futuro in as_completed(futuros):
+            yield futuro.result()
+
+
+def elo(ganadas, empates, perdidas, z=1.96):
+    """
+    Estima la diferencia de Elo a partir del marcador
+
+    Regresa
+    -------
+    tuple: (diferencia, (cota inferior, cota superior)) con un
+        intervalo de confianza normal de z desviaciones estándar
+
+    """
+    n = ganadas + empates + perdidas
+    if n == 0:
+        return 0.0, (float('-inf'), float('inf'))
+    p = (ganadas + empates / 2) / n
+    varianza = (
+        ganadas * (1 - p)**2 + empates * (0.5 - p)**2 + perdidas * p**2
+    ) / n
+    error = sqrt(varianza / n)
+
+    def a_elo(x):
+        if x <= 0:
+            return float('-inf')
+        if x >= 1:
+            return float('inf')
+        return -400 * log10(1 / x - 1)
+
+    return a_elo(p), (a_elo(p - z * error), a_elo(p + z * error))
+
+
+def resumen(resultados):
+    """
+    Junta los resultados de un torneo por cada par de jugadores
+
+    Regresa una lista de diccionarios, uno por par (a, b), con las
+    partidas 'ganadas', 'empates' y 'perdidas' de a contra b, la
+    diferencia de 'elo' de a sobre b con su 'intervalo', y el tiempo
+    'promedio' y 'maximo' por jugada de cada jugador.
+
+    """
+    pares = {}
+    for r in resultados:
+        a, b = r['jugador1'], r['jugador2']
+        g = r['ganancia']
+        if (b, a) in pares:
+            a, b, g = b, a, -g
+        par = pares.setdefault(
+            (a, b), {'a': a, 'b': b, 'ganadas': 0, 'empates': 0,
+                     'perdidas': 0, 'tiempos': {a: [], b: []}}
+        )
+        par['ganadas' if g > 0 else 'perdidas' if g < 0 else 'empates'] += 1
+        for nombre, tiempos in r['tiempos'].items():
+            par['tiempos'][nombre] += tiempos
+
+    salida = []
+    for par in pares.values():
+        par['elo'], par['intervalo'] = elo(
+            par['ganadas'], par['empates'], par['perdidas']
+        )
+        tiempos = par.pop('tiempos')
+        par['promedio'] = {
+            n: sum(t) / len(t) if t else 0.0 for n, t in tiempos.items()
+        }
+        par['maximo'] = {n: max(t, default=0.0) for n, t in tiempos.items()}
+        salida.append(par)
+    return salida
+
+
+def imprime_resumen(pares):
+    for par in pares:
+        inf, sup = par['intervalo']
+        print(f"{par['a']} vs {par['b']}: "
+              f"+{par['ganadas']} ={par['empates']} -{par['perdidas']}  "
+              f"Elo {par['elo']:+.0f} [{inf:+.0f}, {sup:+.0f}]")
+        for n in (par['a'], par['b']):
+            print(f"    {n}: {1000 * par['promedio'][n]:.1f} ms por jugada"
+                  f" (máximo {1000 * par['maximo'][n]:.1f} ms)")
+
+
+if __name__ == '__main__':
+    from argparse import ArgumentParser
+    from conect4 import Conecta4, ordena_centro
+    from conect4 import evalua_3con, evalua_posibles_4con
+    from minimax import jugador_negamax
+
+    parser = ArgumentParser(description="Torneo de conecta 4")
+    parser.add_argument('--partidas', type=int, default=20)
+    parser.add_argument('--profundidad', type=int, default=4)
+    parser.add_argument('--plies', type=int, default=2)
+    parser.add_argument('--procesos', type=int, default=None)
+    parser.add_argument('--semilla', type=int, default=0)
+    args = parser.parse_args()
+
+    d = args.profundidad
+    jugadores = {
+        'centro+3con': partial(
+            jugador_negamax, ordena=ordena_centro, evalua=evalua_3con, d=d),
+        'centro+posibles4': partial(
+            jugador_negamax, ordena=ordena_centro,
+            evalua=evalua_posibles_4con, d=d),
+    }
+    resultados = []
+    for r in torneo(Conecta4(), jugadores, args.partidas, args.plies,
+                    args.procesos, args.semilla):
+        resultados.append(r)
+        print(f"{len(resultados):4d}. {r['jugador1']} vs {r['jugador2']}"
+              f" {r['apertura']}: {r['ganancia']:+d}", flush=True)
+    print()
+    imprime_resumen(resumen(resultados))